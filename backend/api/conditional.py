@@ -0,0 +1,77 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from recipes.models import ReferenceVersion
+
+
+def get_version(model):
+    """Метка версии таблицы model: время последнего изменения.
+
+    Метка хранится в таблице ReferenceVersion, общей для всех процессов,
+    и читается одним запросом.
+    """
+    label = model._meta.label_lower
+    version = ReferenceVersion.objects.filter(
+        label=label
+    ).values_list('version', flat=True).first()
+
+    if version is None:
+        version = ReferenceVersion.objects.get_or_create(
+            label=label
+        )[0].version
+
+    return version
+
+
+def bump_version(model):
+    ReferenceVersion.objects.update_or_create(
+        label=model._meta.label_lower, defaults={'version': time.time()}
+    )
+
+
+class ConditionalGetMixin:
+    """Условные GET для справочников (list и retrieve).
+
+    ETag и Last-Modified строятся по метке версии таблицы version_model,
+    поэтому на If-None-Match и If-Modified-Since ответ 304 отдаётся
+    после одного запроса метки. Cache-Control разрешает кэшировать ответ
+    браузеру и nginx на REFERENCE_CACHE_MAX_AGE секунд.
+    """
+
+    version_model = None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        version = self.version = get_version(self.version_model)
+        last_modified = int(version)
+        etag = quote_etag(hashlib.md5(
+            f'{version!r}:{request.accepted_renderer.format}:'
+            f'{request.get_full_path()}'.encode()
+        ).hexdigest())
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(
+            response, public=True, max_age=settings.REFERENCE_CACHE_MAX_AGE
+        )
+        patch_vary_headers(response, ('Accept',))
+
+        return response
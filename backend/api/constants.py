@@ -5,3 +5,8 @@ SLUG_MAX_LEN = 50
 ITEM_NAME_MAX_LEN = 150
 FIRST_NAME_MAX_LEN = 150
 LAST_NAME_MAX_LEN = 150
+SEARCH_CONFIG = 'russian'
+SUBSCRIPTION_RECIPES_LIMIT = 3
+BULK_RECIPES_MAX = 100
+COMPRESSIBLE_TYPES = ('application/json', 'text/plain', 'text/csv')
+EXPLAIN_SEQ_SCAN_ROWS = 1000
@@ -0,0 +1,88 @@
+import json
+import re
+
+# Таблица и её псевдоним в SQL Django: "recipes_recipe" U0.
+TABLE_ALIAS = re.compile(r'"(\w+)"\s+(?:AS\s+)?"?([A-Z]\d+)"?')
+
+
+class QueryRecorder:
+    """Обёртка execute_wrapper, которая запоминает SELECT-запросы."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip()[:6].upper() == 'SELECT':
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def postgresql_seq_scans(connection, sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        tables = []
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get('Plans', ()))
+            if node['Node Type'] == 'Seq Scan':
+                tables.append(node['Relation Name'])
+
+        scans = []
+        for table in tables:
+            # Оценка планировщика: -1, если таблицу ещё не анализировали.
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                (table,),
+            )
+            scans.append((table, max(cursor.fetchone()[0], 0)))
+
+    return scans
+
+
+def sqlite_seq_scans(connection, sql, params):
+    aliases = dict(
+        (alias, table) for table, alias in TABLE_ALIAS.findall(sql)
+    )
+    table_names = set(connection.introspection.table_names())
+
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        tables = []
+        for *_, detail in cursor.fetchall():
+            # SCAN с USING - просмотр индекса, а не таблицы.
+            words = detail.split()
+            if words[0] != 'SCAN' or 'USING' in words:
+                continue
+            table = aliases.get(words[1], words[1])
+            if table in table_names:
+                tables.append(table)
+
+        scans = []
+        for table in tables:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+            )
+            scans.append((table, cursor.fetchone()[0]))
+
+    return scans
+
+
+SEQ_SCANS = {
+    'postgresql': postgresql_seq_scans,
+    'sqlite': sqlite_seq_scans,
+}
+
+
+def seq_scans(connection, sql, params):
+    """Полные просмотры таблиц в плане запроса: [(таблица, строк)].
+
+    Для PostgreSQL число строк - оценка планировщика (reltuples),
+    для SQLite - точный COUNT(*).
+    """
+    return SEQ_SCANS[connection.vendor](connection, sql, params)
@@ -1,14 +1,11 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import filters, FilterSet
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import OrderingFilter
 
 from recipes.models import Recipe, Tag
 from users.models import CustomUser
 
 
-class IngredientFilter(SearchFilter):
-    search_param = 'name'
-
-
 class RecipeFilter(FilterSet):
     is_favorited = filters.BooleanFilter(
         method='get_is_favorited'
@@ -20,10 +17,14 @@ class RecipeFilter(FilterSet):
         queryset=Tag.objects.all(),
         field_name='tags__slug',
         to_field_name='slug',
+        method='filter_tags',
     )
     author = filters.ModelChoiceFilter(
         queryset=CustomUser.objects.all()
     )
+    search = filters.CharFilter(
+        method='search_recipes'
+    )
 
     class Meta:
         model = Recipe
@@ -32,18 +33,63 @@ class RecipeFilter(FilterSet):
             'author',
             'tags',
             'is_in_shopping_cart',
+            'search',
         )
 
     def get_is_favorited(self, queryset, name, value):
         if self.request.user.is_authenticated and value is True:
-            return queryset.filter(
-                favorites__user=self.request.user
-            )
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         if self.request.user.is_authenticated and value is True:
-            return queryset.filter(
-                shopping_cart__user=self.request.user
+            return queryset.filter(is_in_shopping_cart=True)
+        return queryset
+
+    def filter_tags(self, queryset, name, tags):
+        """Рецепты хотя бы с одним из тегов.
+
+        Слаги уже проверены запросом к Tag, поэтому рецепты выбираются
+        по tag_id из связующей таблицы (индекс recipe_tags_tag_recipe_idx)
+        без соединения с тегами и без DISTINCT.
+        """
+        if not tags:
+            return queryset
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'), tag__in=tags
             )
+        ))
+
+    def search_recipes(self, queryset, name, value):
+        if value.strip():
+            return queryset.search(value.strip())
         return queryset
+
+
+def complete_ordering(ordering, tie_breakers):
+    """Дополняет сортировку полями tie_breakers, которых в ней ещё нет."""
+    fields = {field.lstrip('-') for field in ordering}
+    return tuple(ordering) + tuple(
+        field for field in tie_breakers if field.lstrip('-') not in fields
+    )
+
+
+class StableOrderingFilter(OrderingFilter):
+    """Сортировка из параметра ordering с однозначным порядком.
+
+    Объекты с равными счётчиками без дополнительных полей сортировки
+    возвращаются в произвольном порядке и могут повторяться или
+    пропадать на соседних страницах. Поэтому к любой сортировке,
+    в том числе по релевантности в поиске и по умолчанию, добавляются
+    поля ordering_tie_breakers представления.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        queryset = super().filter_queryset(request, queryset, view)
+        ordering = (
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        return queryset.order_by(
+            *complete_ordering(ordering, view.ordering_tie_breakers)
+        )
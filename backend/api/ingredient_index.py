@@ -0,0 +1,84 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from api.conditional import get_version
+from recipes.models import Ingredient
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов в памяти процесса для автодополнения.
+
+    Названия хранятся в отсортированном массиве в нижнем регистре
+    (casefold): совпадения по префиксу ищутся бинарным поиском, затем
+    добавляются совпадения по подстроке. Индекс сбрасывается сигналами
+    модели Ingredient и перестраивается при смене метки версии таблицы
+    (см. api.conditional), в том числе после jsontodb в другом процессе.
+    Изменения в обход сигналов и метки подхватываются не позже чем через
+    INGREDIENT_INDEX_TTL секунд.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+
+    def invalidate(self):
+        self._index = None
+
+    def _get_index(self, version=None):
+        index = self._index
+        ttl = getattr(settings, 'INGREDIENT_INDEX_TTL', 300)
+        if version is None:
+            version = get_version(Ingredient)
+
+        if (
+            index is not None
+            and index[3] == version
+            and time.monotonic() - index[2] < ttl
+        ):
+            return index
+
+        with self._lock:
+            if (
+                self._index is not index
+                and self._index is not None
+                and self._index[3] == version
+            ):
+                return self._index
+            items = sorted(
+                Ingredient.objects.values('id', 'name', 'measurement_unit'),
+                key=lambda item: (item['name'].casefold(), item['id'])
+            )
+            keys = [item['name'].casefold() for item in items]
+            index = (keys, items, time.monotonic(), version)
+            self._index = index
+
+        return index
+
+    def search(self, query='', version=None):
+        """Возвращает ингредиенты, чьё название начинается с query,
+        а за ними те, что содержат query в середине. version - уже
+        прочитанная метка версии таблицы ингредиентов."""
+        keys, items, _, _ = self._get_index(version)
+        query = query.strip().casefold()
+
+        if not query:
+            return list(items)
+
+        start = bisect_left(keys, query)
+        end = start
+
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+
+        substring = [
+            item for index, (key, item) in enumerate(zip(keys, items))
+            if query in key and not start <= index < end
+        ]
+
+        return items[start:end] + substring
+
+
+ingredient_index = IngredientIndex()
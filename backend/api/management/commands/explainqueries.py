@@ -0,0 +1,144 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.constants import EXPLAIN_SEQ_SCAN_ROWS
+from api.explain import SEQ_SCANS, QueryRecorder, seq_scans
+from recipes.models import Recipe, Tag
+from users.models import CustomUser
+
+SQL_PREVIEW_LEN = 300
+
+
+def default_paths():
+    """GET-эндпоинты API с параметрами из текущих данных."""
+    paths = [
+        '/api/tags/',
+        '/api/ingredients/?name=а',
+        '/api/recipes/',
+        '/api/recipes/?is_favorited=1',
+        '/api/recipes/?is_in_shopping_cart=1',
+        '/api/recipes/?search=суп',
+        '/api/users/',
+        '/api/users/me/',
+        '/api/users/subscriptions/?recipes_limit=3',
+        '/api/recipes/download_shopping_cart/',
+        '/api/recipes/shopping_cart_summary/',
+    ]
+    recipe = Recipe.objects.order_by('-pub_date', '-id').first()
+    if recipe is not None:
+        paths += [
+            f'/api/recipes/{recipe.id}/',
+            f'/api/recipes/?author={recipe.author_id}',
+            f'/api/users/{recipe.author_id}/',
+        ]
+    tags = '&'.join(
+        f'tags={slug}'
+        for slug in Tag.objects.values_list('slug', flat=True)[:2]
+    )
+    if tags:
+        paths.append(f'/api/recipes/?{tags}')
+
+    return paths
+
+
+def request_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*' and not host.startswith('.'):
+            return host
+    return 'testserver'
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Выполняет EXPLAIN для SQL-запросов эндпоинтов API и находит '
+        'полные просмотры больших таблиц'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Пути GET-запросов, по умолчанию основные эндпоинты API.'
+        )
+        parser.add_argument(
+            '--user',
+            help='E-mail пользователя, от имени которого выполняются '
+                 'запросы. По умолчанию - пользователь с наибольшим '
+                 'числом подписок.'
+        )
+        parser.add_argument(
+            '--threshold', type=int, default=EXPLAIN_SEQ_SCAN_ROWS,
+            help='Полный просмотр таблицы от этого числа строк '
+                 'считается проблемой.'
+        )
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Завершиться с ошибкой, если найдены полные просмотры.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SEQ_SCANS:
+            raise CommandError(
+                f'EXPLAIN для {connection.vendor} не поддерживается'
+            )
+
+        users = CustomUser.objects.all()
+        if options['user']:
+            users = users.filter(email=options['user'])
+        user = users.order_by('-following_count', 'id').first()
+        if user is None:
+            raise CommandError('Пользователь не найден')
+
+        client = APIClient(HTTP_HOST=request_host())
+        client.force_authenticate(user)
+        found = 0
+
+        for path in options['paths'] or default_paths():
+            found += self.explain(client, path, options['threshold'])
+
+        message = f'Полных просмотров от {options["threshold"]} строк: {found}'
+        if found and options['strict']:
+            raise CommandError(message)
+        self.stdout.write(
+            self.style.WARNING(message) if found
+            else self.style.SUCCESS(message)
+        )
+
+    def explain(self, client, path, threshold):
+        recorder = QueryRecorder()
+
+        # Кэши ответов и count отключены, чтобы запросы не зависели
+        # от предыдущих запусков; изменения в базе откатываются.
+        with override_settings(
+            RESPONSE_CACHE_TTL=0, PAGINATION_COUNT_CACHE_TTL=0
+        ), transaction.atomic():
+            with connection.execute_wrapper(recorder):
+                response = client.get(path)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'GET {path} - {response.status_code}, '
+            f'запросов: {len(recorder.queries)}'
+        )
+        found = 0
+        explained = set()
+        for sql, params in recorder.queries:
+            key = (sql, tuple(params or ()))
+            if key in explained:
+                continue
+            explained.add(key)
+            for table, rows in seq_scans(connection, sql, params):
+                if rows < threshold:
+                    continue
+                found += 1
+                self.stdout.write(self.style.WARNING(
+                    f'  полный просмотр {table}: ~{rows} строк'
+                ))
+                self.stdout.write(f'    {sql[:SQL_PREVIEW_LEN]}')
+
+        return found
@@ -0,0 +1,136 @@
+import gzip
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from api.constants import COMPRESSIBLE_TYPES
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """Словарь кодировка -> q из заголовка Accept-Encoding."""
+    weights = {}
+
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+
+    return weights
+
+
+def choose_encoding(header):
+    """br или gzip, если клиент их принимает; br выигрывает при равных q."""
+    weights = parse_accept_encoding(header)
+    default = weights.get('*', 0.0)
+    codings = ('br', 'gzip') if brotli is not None else ('gzip',)
+    best, best_weight = None, 0.0
+
+    for coding in codings:
+        weight = weights.get(coding, default)
+        if weight > best_weight:
+            best, best_weight = coding, weight
+
+    return best
+
+
+def gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def brotli_stream(chunks, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие ответов API в br (если установлен brotli) или gzip.
+
+    Сжимаются только JSON, txt и csv: HTML с CSRF-токеном не трогаем
+    (BREACH). Обычные ответы меньше COMPRESSION_MIN_SIZE байт
+    и ответы, которые не стали меньше, отдаются как есть. Потоковые
+    ответы (большой список покупок) сжимаются по частям без сброса
+    буфера на каждом куске, Content-Length у них удаляется. Сильный
+    ETag становится слабым: If-None-Match сравнивается слабо, поэтому
+    304 продолжают работать для обеих версий ответа.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if content_type.split(';')[0].strip().lower() not in (
+            COMPRESSIBLE_TYPES
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding == 'br':
+                response.streaming_content = brotli_stream(
+                    response.streaming_content, settings.BROTLI_QUALITY
+                )
+            else:
+                response.streaming_content = gzip_stream(
+                    response.streaming_content, settings.GZIP_LEVEL
+                )
+            del response['Content-Length']
+        else:
+            if encoding == 'br':
+                content = brotli.compress(
+                    response.content, quality=settings.BROTLI_QUALITY
+                )
+            else:
+                content = gzip.compress(
+                    response.content,
+                    compresslevel=settings.GZIP_LEVEL,
+                    mtime=0,
+                )
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+
+        return response
@@ -1,6 +1,323 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import hashlib
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по курсору (keyset) без COUNT и OFFSET.
+
+    Курсор хранит значения полей сортировки последнего объекта страницы,
+    следующая страница выбирается условием
+    (pub_date, id) < (последний pub_date, последний id), поэтому время
+    ответа не зависит от глубины прокрутки. Поля сортировки берутся
+    из атрибута cursor_ordering представления. Если queryset уже
+    отсортирован иначе (например, по релевантности в поиске), курсор
+    не может сохранить этот порядок, и запрос отклоняется.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор'
+    unsupported_ordering_message = (
+        'Пагинация по курсору недоступна для этой сортировки'
+    )
+
+    def __init__(self, page_size, ordering):
+        self.page_size = page_size
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        current = tuple(queryset.query.order_by)
+        if current and current != self.ordering[:len(current)]:
+            raise ValidationError(
+                {'pagination': [self.unsupported_ordering_message]}
+            )
+        values, reverse = self.decode_cursor(request, queryset.model)
+        ordering = self.ordering
+
+        if reverse:
+            ordering = tuple(self.invert(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+
+        if values is not None:
+            queryset = queryset.filter(self.after(ordering, values))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+
+        self.next_values = self.previous_values = None
+        if results:
+            if has_more or reverse:
+                self.next_values = self.position(results[-1])
+            if (has_more and reverse) or (values is not None and not reverse):
+                self.previous_values = self.position(results[0])
+
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.next_values, reverse=False),
+            'previous': self.get_link(self.previous_values, reverse=True),
+            'results': data,
+        })
+
+    def get_link(self, values, reverse):
+        if values is None:
+            return None
+
+        cursor = base64.urlsafe_b64encode(
+            json.dumps({'v': values, 'r': reverse}).encode()
+        ).decode()
+
+        return replace_query_param(
+            remove_query_param(self.base_url, 'page'),
+            self.cursor_query_param,
+            cursor,
+        )
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = cursor['v']
+            if len(values) != len(self.fields):
+                raise ValueError
+            values = [
+                self.to_python(model, field, value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, bool(cursor.get('r'))
+
+    def to_python(self, model, field, value):
+        try:
+            return model._meta.get_field(field).to_python(value)
+        except FieldDoesNotExist:
+            return value
+
+    def position(self, instance):
+        values = []
+
+        for field in self.fields:
+            value = getattr(instance, field)
+            values.append(
+                value.isoformat() if hasattr(value, 'isoformat') else value
+            )
+
+        return values
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def after(ordering, values):
+        """Условие «строго после позиции» для сортировки ordering."""
+        conditions = []
+
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {
+                previous.lstrip('-'): value
+                for previous, value in zip(ordering[:index], values)
+            }
+            conditions.append(
+                Q(**equal) & Q(**{f'{name}__{lookup}': values[index]})
+            )
+
+        return reduce(or_, conditions)
+
+
+class CountingPage(Page):
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CountingPaginator(Paginator):
+    """Пагинатор с кэшируемым и оценочным подсчётом объектов.
+
+    Для больших таблиц без фильтров на PostgreSQL count берётся из оценки
+    планировщика (pg_class.reltuples), остальные подсчёты кэшируются
+    на PAGINATION_COUNT_CACHE_TTL секунд по SQL-запросу, то есть отдельно
+    для каждой комбинации фильтров. Аннотации и сортировка в подсчёт
+    не входят: флаги текущего пользователя (with_user_flags) не делят
+    кэш по пользователям, а фильтры по ним остаются в WHERE.
+    Страница выбирается с одним лишним
+    объектом, поэтому наличие следующей страницы не зависит от точности
+    count.
+    """
+
+    count_is_exact = True
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+
+        if not hasattr(queryset, 'query'):
+            return len(queryset)
+
+        estimate = self.estimate_count(queryset)
+        if estimate is not None:
+            self.count_is_exact = False
+            return estimate
+
+        queryset = self.count_queryset(queryset)
+        ttl = getattr(settings, 'PAGINATION_COUNT_CACHE_TTL', 0)
+        if not ttl:
+            return queryset.count()
+
+        key = self.cache_key(queryset)
+        count = cache.get(key)
+        if count is not None:
+            self.count_is_exact = False
+            return count
+
+        count = queryset.count()
+        cache.set(key, count, ttl)
+
+        return count
+
+    @staticmethod
+    def count_queryset(queryset):
+        """Queryset для подсчёта без выбираемых аннотаций и сортировки."""
+        queryset = queryset.all()
+        queryset.query.clear_ordering(force_empty=True)
+        queryset.query.set_annotation_mask(())
+        return queryset
+
+    def cache_key(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.md5(
+            f'{queryset.db}:{sql}:{params!r}'.encode()
+        ).hexdigest()
+
+        return f'pagination:count:{digest}'
+
+    def estimate_count(self, queryset):
+        threshold = getattr(settings, 'PAGINATION_ESTIMATE_THRESHOLD', None)
+        connection = connections[queryset.db]
+        query = queryset.query
+
+        if (
+            not threshold
+            or connection.vendor != 'postgresql'
+            or query.where
+            or query.combinator
+            or query.low_mark
+            or query.high_mark is not None
+        ):
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+
+        if row is None or row[0] < threshold:
+            return None
+
+        return row[0]
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+
+        if not objects and number > 1:
+            raise EmptyPage('На этой странице нет результатов')
+
+        return CountingPage(
+            objects[:self.per_page], number, self,
+            has_next=len(objects) > self.per_page,
+        )
 
 
 class CustomPagination(PageNumberPagination):
+    """Постраничная пагинация с параметрами page и limit.
+
+    Подсчёт count кэшируется или оценивается (см. CountingPaginator),
+    поле count_is_exact в ответе показывает, точен ли он.
+    Если представление задаёт cursor_ordering, клиент может включить
+    пагинацию по курсору параметром ?pagination=cursor; ссылки next
+    и previous в ответе содержат параметр cursor.
+    """
+
+    django_paginator_class = CountingPaginator
     page_size = 6
     page_size_query_param = 'limit'
+    mode_query_param = 'pagination'
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'cursor_ordering', None)
+
+        if ordering and self.use_cursor(request):
+            self.keyset = KeysetPagination(
+                self.get_page_size(request), ordering
+            )
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_exact': self.page.paginator.count_is_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
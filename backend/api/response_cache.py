@@ -0,0 +1,128 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 0.05
+
+GLOBAL_GENERATION = 'response:generation'
+LIST_GENERATION = 'response:generation:recipes'
+
+
+def recipe_generation(recipe_id):
+    return f'response:generation:recipe:{recipe_id}'
+
+
+def get_generations(keys):
+    """Текущие поколения ключей; недостающие создаются."""
+    generations = cache.get_many(keys)
+
+    for key in keys:
+        if key not in generations:
+            cache.add(key, uuid.uuid4().hex, None)
+            generations[key] = cache.get(key)
+
+    return [generations[key] for key in keys]
+
+
+def bump(*keys):
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def invalidate_all():
+    """Сбрасывает все ответы: меняются теги или ингредиенты."""
+    bump(GLOBAL_GENERATION)
+
+
+def invalidate_recipes(recipe_ids):
+    """Сбрасывает страницы списка и карточки рецептов recipe_ids."""
+    bump(LIST_GENERATION, *map(recipe_generation, recipe_ids))
+
+
+class AnonymousCacheMixin:
+    """Кэш ответов list и retrieve для анонимных пользователей.
+
+    Ключ строится из пути, отсортированных параметров запроса и поколений:
+    общего (теги, ингредиенты), списка рецептов и конкретного рецепта.
+    Сигналы меняют поколения, и старые записи просто перестают
+    использоваться. Пока один воркер собирает ответ для ключа, остальные
+    ждут его результат (блокировка через cache.add).
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(
+            (GLOBAL_GENERATION, LIST_GENERATION),
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = str(kwargs.get('pk', ''))
+
+        if not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+
+        return self.cached(
+            (GLOBAL_GENERATION, recipe_generation(pk)),
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached(self, generation_keys, handler, request, *args, **kwargs):
+        ttl = settings.RESPONSE_CACHE_TTL
+
+        if not ttl or not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+
+        key = self.response_cache_key(request, generation_keys)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        lock = f'{key}:lock'
+        locked = cache.add(lock, 1, LOCK_TIMEOUT)
+        if not locked:
+            data = self.wait_for(key, lock)
+            if data is not None:
+                return Response(data)
+
+        try:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, ttl)
+        finally:
+            if locked:
+                cache.delete(lock)
+
+        return response
+
+    def response_cache_key(self, request, generation_keys):
+        params = sorted(
+            (name, sorted(values))
+            for name, values in request.query_params.lists()
+        )
+        digest = hashlib.md5(repr((
+            request.get_host(),
+            request.path,
+            params,
+            get_generations(generation_keys),
+        )).encode()).hexdigest()
+
+        return f'response:{digest}'
+
+    def wait_for(self, key, lock):
+        """Ждёт ответ, который собирает другой воркер. Возвращает None,
+        если блокировка снята без результата (например, ответ 404)."""
+        deadline = time.monotonic() + LOCK_TIMEOUT
+
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_WAIT)
+            values = cache.get_many([key, lock])
+            if key in values:
+                return values[key]
+            if lock not in values:
+                return None
+
+        return None
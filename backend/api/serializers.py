@@ -1,16 +1,19 @@
 import base64
 
+from django.conf import settings
 from django.core.files.base import ContentFile
 from django.db import transaction
 from rest_framework import serializers
 
+from api.constants import BULK_RECIPES_MAX
+from recipes.images import variant_url, variant_urls
 from recipes.models import (Ingredient, IngredientsInRecipe, Recipe,
-                            Tag)
+                            ShoppingListItem, Tag)
+from recipes.shopping_list import refresh_recipe_in_shopping_lists
 from users.serializers import CustomUserSerializer
 
 TIME_TO_COOKING_MIN = 1
 TIME_TO_COOKING_MAX = 32000
-M_I = 1
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -84,8 +87,11 @@ class RecipeSerializer(serializers.ModelSerializer):
         many=True,
         read_only=True,
     )
-    image = serializers.ReadOnlyField(
-        source='image.url'
+    image = serializers.SerializerMethodField(
+        method_name='get_image'
+    )
+    image_variants = serializers.SerializerMethodField(
+        method_name='get_image_variants'
     )
     is_favorited = serializers.SerializerMethodField(
         method_name='get_is_favorited'
@@ -103,13 +109,41 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
             'id',
             'ingredients',
+            'favorites_count',
+            'shopping_cart_count',
         )
 
+    def to_representation(self, instance):
+        author_is_subscribed = getattr(instance, 'author_is_subscribed', None)
+
+        if author_is_subscribed is not None:
+            instance.author.is_subscribed = author_is_subscribed
+
+        return super().to_representation(instance)
+
+    def get_image(self, obj):
+        """Копия заданной в контексте ширины (image_width) или оригинал."""
+        width = self.context.get('image_width')
+
+        if width:
+            return variant_url(obj, width)
+
+        return obj.image.url
+
+    def get_image_variants(self, obj):
+        return variant_urls(obj)
+
     def get_is_favorited(self, obj):
+        is_favorited = getattr(obj, 'is_favorited', None)
+
+        if is_favorited is not None:
+            return is_favorited
+
         request = self.context.get('request')
 
         if not request or request.user.is_anonymous:
@@ -118,6 +152,11 @@ class RecipeSerializer(serializers.ModelSerializer):
         return request.user.favorites.filter(recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        is_in_shopping_cart = getattr(obj, 'is_in_shopping_cart', None)
+
+        if is_in_shopping_cart is not None:
+            return is_in_shopping_cart
+
         request = self.context.get('request')
 
         if not request or request.user.is_anonymous:
@@ -126,10 +165,94 @@ class RecipeSerializer(serializers.ModelSerializer):
         return request.user.shopping_cart.filter(recipe=obj).exists()
 
 
+class RecipeReadSerializer(serializers.BaseSerializer):
+    """Быстрое чтение рецептов для списка и страницы рецепта.
+
+    Отдаёт тот же JSON, что и RecipeSerializer, но собирает его
+    обычными словарями из объектов, загруженных with_related()
+    и with_user_flags(), без полей DRF на каждый атрибут.
+    """
+
+    def to_representation(self, instance):
+        author = instance.author
+        width = self.context.get('image_width')
+
+        return {
+            'tags': [
+                {
+                    'id': tag.id,
+                    'name': tag.name,
+                    'color': tag.color,
+                    'slug': tag.slug,
+                }
+                for tag in instance.tags.all()
+            ],
+            'author': {
+                'email': author.email,
+                'id': author.id,
+                'username': author.username,
+                'first_name': author.first_name,
+                'last_name': author.last_name,
+                'is_subscribed': self.get_is_subscribed(instance),
+            },
+            'is_favorited': self.get_flag(
+                instance, 'is_favorited', 'favorites'
+            ),
+            'is_in_shopping_cart': self.get_flag(
+                instance, 'is_in_shopping_cart', 'shopping_cart'
+            ),
+            'name': instance.name,
+            'image': (
+                variant_url(instance, width) if width
+                else instance.image.url
+            ),
+            'image_variants': variant_urls(instance),
+            'text': instance.text,
+            'cooking_time': instance.cooking_time,
+            'id': instance.id,
+            'ingredients': [
+                {
+                    'id': item.ingredient.id,
+                    'name': item.ingredient.name,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                    'amount': item.amount,
+                }
+                for item in instance.ingredient_in_recipe.all()
+            ],
+            'favorites_count': instance.favorites_count,
+            'shopping_cart_count': instance.shopping_cart_count,
+        }
+
+    def get_flag(self, obj, name, related_name):
+        value = getattr(obj, name, None)
+
+        if value is not None:
+            return value
+
+        request = self.context.get('request')
+
+        if not request or request.user.is_anonymous:
+            return False
+
+        return getattr(request.user, related_name).filter(
+            recipe=obj
+        ).exists()
+
+    def get_is_subscribed(self, obj):
+        value = getattr(obj, 'author_is_subscribed', None)
+
+        if value is not None:
+            return value
+
+        return CustomUserSerializer(
+            context=self.context
+        ).get_is_subscribed(obj.author)
+
+
 class IngredientAddSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    # Существование ингредиентов проверяется одним запросом
+    # в RecipeAddSerializer.validate_ingredients.
+    id = serializers.IntegerField()
     amount = serializers.IntegerField()
 
     class Meta:
@@ -145,9 +268,8 @@ class IngredientAddSerializer(serializers.ModelSerializer):
 
 
 class RecipeAddSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
+    tags = serializers.ListField(
+        child=serializers.IntegerField()
     )
     ingredients = IngredientAddSerializer(
         many=True
@@ -183,7 +305,17 @@ class RecipeAddSerializer(serializers.ModelSerializer):
         )
 
     def to_representation(self, instance):
-        serializer = RecipeSerializer(instance)
+        # Рецепт перечитывается с предзагрузкой, чтобы ответ
+        # не делал по запросу на каждый ингредиент.
+        recipes = Recipe.objects.with_related()
+        request = self.context.get('request')
+
+        if request:
+            recipes = recipes.with_user_flags(request.user)
+
+        serializer = RecipeSerializer(
+            recipes.get(pk=instance.pk), context=self.context
+        )
 
         return serializer.data
 
@@ -193,7 +325,7 @@ class RecipeAddSerializer(serializers.ModelSerializer):
             amount = ingredient['amount']
             ingredient_id = ingredient['id']
             ingredients_to_create.append(
-                IngredientsInRecipe(recipe=recipe, ingredient=ingredient_id,
+                IngredientsInRecipe(recipe=recipe, ingredient_id=ingredient_id,
                                     amount=amount)
             )
 
@@ -205,58 +337,131 @@ class RecipeAddSerializer(serializers.ModelSerializer):
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
-        recipe.save()
         self.add_ingredients(ingredients, recipe)
 
         return recipe
 
+    def update_ingredients(self, ingredients, recipe):
+        """Приводит состав рецепта к ingredients: добавляет новые,
+        меняет количество изменившихся и удаляет лишние ингредиенты.
+
+        Возвращает id ингредиентов, которые изменились.
+        """
+        stored = {
+            item.ingredient_id: item
+            for item in recipe.ingredient_in_recipe.all()
+        }
+        submitted = {item['id']: item['amount'] for item in ingredients}
+        removed = stored.keys() - submitted.keys()
+        added = submitted.keys() - stored.keys()
+        changed = [
+            stored[ingredient_id]
+            for ingredient_id in stored.keys() & submitted.keys()
+            if stored[ingredient_id].amount != submitted[ingredient_id]
+        ]
+
+        if removed:
+            IngredientsInRecipe.objects.filter(
+                recipe=recipe, ingredient__in=removed
+            ).delete()
+        if added:
+            IngredientsInRecipe.objects.bulk_create(
+                IngredientsInRecipe(
+                    recipe=recipe,
+                    ingredient_id=ingredient_id,
+                    amount=submitted[ingredient_id],
+                )
+                for ingredient_id in added
+            )
+        for item in changed:
+            item.amount = submitted[item.ingredient_id]
+        if changed:
+            IngredientsInRecipe.objects.bulk_update(changed, ('amount',))
+
+        return removed | added | {item.ingredient_id for item in changed}
+
     @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
+        # При PATCH без ingredients или tags состав и теги не меняются.
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
 
-        if ingredients is not None:
-            instance.ingredients.clear()
+        if tags is not None:
+            instance.tags.set(tags)
 
-        self.add_ingredients(ingredients, instance)
-        instance.tags.clear()
-        instance.tags.set(tags)
+        if ingredients is not None:
+            ingredient_ids = self.update_ingredients(ingredients, instance)
+            if ingredient_ids:
+                refresh_recipe_in_shopping_lists(instance.id, ingredient_ids)
 
         return super().update(instance, validated_data)
 
-    def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
-
-        if not ingredients:
+    def validate_ingredients(self, value):
+        if not value:
             raise serializers.ValidationError('Необходимо указать ингредиент')
 
-        ingredients_list = set(item['id'] for item in ingredients)
-
-        for name in ingredients_list:
-            if name in ingredients_list and len(ingredients_list) > M_I:
-                raise serializers.ValidationError('Такой ингредиент уже есть')
+        self.validate_ids(
+            [item['id'] for item in value],
+            Ingredient,
+            not_found='Ингредиент не найден',
+            duplicate='Такой ингредиент уже есть',
+            nested=True,
+        )
 
-        return data
+        return value
 
     def validate_tags(self, value):
-        tags = value
-
-        if not tags:
+        if not value:
             raise serializers.ValidationError(
                 'Необходимо выбрать хотя бы один тег!'
             )
 
-        if len(tags) != len(set(tags)):
-            raise serializers.ValidationError(
-                'Теги должны быть уникальными'
-            )
+        self.validate_ids(
+            value,
+            Tag,
+            not_found='Тег не найден',
+            duplicate='Теги должны быть уникальными',
+        )
 
         return value
 
+    def validate_ids(self, ids, model, not_found, duplicate, nested=False):
+        """Проверяет id одним запросом IN и сообщает об ошибке
+        для каждого неизвестного или повторного элемента.
+
+        Для вложенных объектов ошибки, как у вложенного сериализатора,
+        идут списком по элементам, для списка id - словарём по индексам.
+        """
+        existing = set(
+            model.objects.filter(
+                pk__in=set(ids)
+            ).order_by().values_list('pk', flat=True)
+        )
+        errors = {}
+        seen = set()
+
+        for index, pk in enumerate(ids):
+            if pk not in existing:
+                errors[index] = [not_found]
+            elif pk in seen:
+                errors[index] = [duplicate]
+            seen.add(pk)
+
+        if not errors:
+            return
+
+        if nested:
+            errors = [
+                {'id': errors[index]} if index in errors else {}
+                for index in range(len(ids))
+            ]
+
+        raise serializers.ValidationError(errors)
+
 
 class RecipeSmallSerializer(serializers.ModelSerializer):
-    image = serializers.ReadOnlyField(
-        source='image.url'
+    image = serializers.SerializerMethodField(
+        method_name='get_image'
     )
 
     class Meta:
@@ -267,3 +472,26 @@ class RecipeSmallSerializer(serializers.ModelSerializer):
             'image',
             'cooking_time'
         )
+
+    def get_image(self, obj):
+        return variant_url(obj, settings.RECIPE_CARD_IMAGE_WIDTH)
+
+
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RECIPES_MAX,
+    )
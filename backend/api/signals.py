@@ -0,0 +1,71 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.conditional import bump_version
+from api.ingredient_index import ingredient_index
+from api.response_cache import invalidate_all, invalidate_recipes
+from recipes.images import image_variants_ready
+from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
+                            ShoppingCart, Tag)
+from recipes.user_recipes import user_recipes_changed
+from users.models import CustomUser
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    bump_version(Ingredient)
+    ingredient_index.invalidate()
+    invalidate_all()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_version(sender, **kwargs):
+    bump_version(Tag)
+    invalidate_all()
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    invalidate_recipes([instance.pk])
+
+
+@receiver(image_variants_ready, sender=Recipe)
+def invalidate_recipe_image(sender, recipe_id, **kwargs):
+    invalidate_recipes([recipe_id])
+
+
+@receiver((post_save, post_delete), sender=IngredientsInRecipe)
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def invalidate_related_recipe(sender, instance, **kwargs):
+    # Состав рецепта и счётчики избранного и списков покупок
+    # входят в ответ для анонимных пользователей.
+    invalidate_recipes([instance.recipe_id])
+
+
+@receiver(user_recipes_changed, sender=Favorite)
+@receiver(user_recipes_changed, sender=ShoppingCart)
+def invalidate_user_recipes(sender, recipe_ids, **kwargs):
+    invalidate_recipes(recipe_ids)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+
+    if reverse:
+        invalidate_all()
+    else:
+        invalidate_recipes([instance.pk])
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_author_recipes(sender, instance, update_fields, **kwargs):
+    # Вход пользователя обновляет только last_login.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+
+    invalidate_recipes(
+        Recipe.objects.filter(author=instance).values_list('id', flat=True)
+    )
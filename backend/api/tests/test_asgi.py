@@ -0,0 +1,51 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+from asgiref.testing import ApplicationCommunicator
+from django.test import SimpleTestCase
+from rest_framework.response import Response
+
+from foodgram.asgi import application
+
+
+class AsgiTestCase(SimpleTestCase):
+    """Синхронный код запросов под ASGI выполняется в разных потоках."""
+
+    async def get(self, path):
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'testserver')],
+            'server': ('testserver', 80),
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output(timeout=5)
+        body = await communicator.receive_output(timeout=5)
+        return start['status'], body['body']
+
+    async def test_concurrent_requests(self):
+        # Оба запроса ждут друг друга внутри представления: в общем
+        # потоке второй запрос не начался бы, пока не завершён первый.
+        barrier = threading.Barrier(2, timeout=5)
+        threads = set()
+
+        def tags(view, request, *args, **kwargs):
+            threads.add(threading.get_ident())
+            barrier.wait()
+            return Response([])
+
+        with patch('api.views.TagViewSet.list', tags):
+            responses = await asyncio.gather(
+                self.get('/api/tags/'), self.get('/api/tags/')
+            )
+
+        self.assertEqual(responses, [(200, b'[]')] * 2)
+        self.assertEqual(len(threads), 2)
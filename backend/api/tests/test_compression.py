@@ -0,0 +1,121 @@
+import gzip
+import json
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from api.middleware import brotli, choose_encoding
+from recipes.models import (Ingredient, Recipe, ShoppingCart,
+                            ShoppingListItem)
+from users.models import CustomUser
+
+
+class CompressionTestCase(APITestCase):
+    """Сжатие ответов API и согласование Accept-Encoding."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='user@foodgram.ru',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент{index}', measurement_unit='г'
+            )
+            for index in range(50)
+        ]
+        recipe = Recipe.objects.create(
+            author=cls.user,
+            name='Рецепт',
+            image='recipes/IMG_9553.JPG',
+            text='Описание',
+            cooking_time=10,
+        )
+        ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user=cls.user, ingredient=ingredient, amount=index + 1
+            )
+            for index, ingredient in enumerate(cls.ingredients)
+        )
+
+    def get(self, url, encoding, **extra):
+        return self.client.get(url, HTTP_ACCEPT_ENCODING=encoding, **extra)
+
+    def test_choose_encoding(self):
+        best = 'br' if brotli is not None else 'gzip'
+        for header, expected in (
+            ('', None),
+            ('identity', None),
+            ('gzip', 'gzip'),
+            ('gzip, deflate, br', best),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('gzip;q=0', None),
+            ('*', best),
+            ('*, gzip;q=0', 'br' if brotli is not None else None),
+        ):
+            with self.subTest(header=header):
+                self.assertEqual(choose_encoding(header), expected)
+
+    def test_gzip(self):
+        plain = self.get('/api/ingredients/', '')
+        response = self.get('/api/ingredients/', 'gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+    def test_brotli(self):
+        if brotli is None:
+            self.skipTest('brotli не установлен')
+        plain = self.get('/api/ingredients/', '')
+        response = self.get('/api/ingredients/', 'gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    def test_min_size(self):
+        url = f'/api/ingredients/{self.ingredients[0].id}/'
+        response = self.get(url, 'gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        with override_settings(COMPRESSION_MIN_SIZE=0):
+            response = self.get(url, 'gzip')
+        # Короткий ответ после сжатия не становится меньше.
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_weak_etag(self):
+        plain = self.get('/api/ingredients/', '')
+        response = self.get('/api/ingredients/', 'gzip')
+
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        for etag in (plain['ETag'], response['ETag']):
+            with self.subTest(etag=etag):
+                response = self.get(
+                    '/api/ingredients/', 'gzip', HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_streamed_shopping_list(self):
+        self.client.force_authenticate(self.user)
+        url = '/api/recipes/download_shopping_cart/?format=json'
+        plain = self.get(url, '')
+
+        with mock.patch('api.views.SHOPPING_LIST_BUFFER_ROWS', 10):
+            response = self.get(url, 'gzip')
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(json.loads(content), json.loads(plain.content))
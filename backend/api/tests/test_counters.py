@@ -0,0 +1,132 @@
+from rest_framework.test import APITestCase
+
+from recipes.counters import rebuild_counters
+from recipes.models import Favorite, Recipe
+from users.models import CustomUser, Subscribe
+
+
+class CountersTestCase(APITestCase):
+    """Счётчики, обновляемые сигналами, совпадают с пересчитанными."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create_user(
+                email=f'user{index}@foodgram.ru',
+                username=f'user{index}',
+                first_name=f'Имя{index}',
+                last_name=f'Фамилия{index}',
+                password='foodgram-password',
+            )
+            for index in range(3)
+        ]
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.users[index % 2],
+                name=f'Рецепт{index}',
+                image='recipes/IMG_9553.JPG',
+                text='Описание',
+                cooking_time=10,
+            )
+            for index in range(4)
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(self.users[2])
+
+    def snapshot(self):
+        return (
+            list(Recipe.objects.order_by('id').values_list(
+                'id', 'favorites_count', 'shopping_cart_count'
+            )),
+            list(CustomUser.objects.order_by('id').values_list(
+                'id', 'recipes_count', 'followers_count', 'following_count'
+            )),
+        )
+
+    def assertCountersActual(self):
+        counters = self.snapshot()
+        rebuild_counters()
+        self.assertEqual(counters, self.snapshot())
+
+    def test_counters(self):
+        for recipe in self.recipes[:3]:
+            self.client.post(f'/api/recipes/{recipe.id}/favorite/')
+            self.client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+        self.client.post(f'/api/users/{self.users[0].id}/subscribe/')
+        Subscribe.objects.create(user=self.users[1], author=self.users[0])
+        self.assertCountersActual()
+
+        self.client.delete(f'/api/recipes/{self.recipes[0].id}/favorite/')
+        self.client.delete(f'/api/users/{self.users[0].id}/subscribe/')
+        self.recipes[1].delete()
+        self.assertCountersActual()
+
+        self.assertEqual(Favorite.objects.count(), 1)
+        self.assertEqual(
+            CustomUser.objects.get(pk=self.users[0].pk).followers_count, 1
+        )
+
+    def test_ordering(self):
+        Favorite.objects.create(user=self.users[0], recipe=self.recipes[2])
+        Favorite.objects.create(user=self.users[1], recipe=self.recipes[2])
+        Favorite.objects.create(user=self.users[1], recipe=self.recipes[3])
+
+        for params in ('', '&pagination=cursor'):
+            response = self.client.get(
+                f'/api/recipes/?ordering=-favorites_count&limit=2{params}'
+            )
+            self.assertEqual(
+                [item['id'] for item in response.json()['results']],
+                [self.recipes[2].id, self.recipes[3].id],
+            )
+
+    def test_ordering_ties(self):
+        for params in ('', '&pagination=cursor'):
+            response = self.client.get(
+                f'/api/recipes/?ordering=-favorites_count&limit=10{params}'
+            )
+            self.assertEqual(
+                [item['id'] for item in response.json()['results']],
+                [recipe.id for recipe in reversed(self.recipes)],
+            )
+
+    def test_users_ordering(self):
+        Subscribe.objects.create(user=self.users[0], author=self.users[1])
+        Subscribe.objects.create(user=self.users[2], author=self.users[1])
+        Subscribe.objects.create(user=self.users[2], author=self.users[0])
+
+        response = self.client.get('/api/users/?ordering=-followers_count')
+        results = response.json()
+        self.assertEqual(
+            [user['id'] for user in results],
+            [self.users[1].id, self.users[0].id, self.users[2].id],
+        )
+        self.assertEqual(results[0]['followers_count'], 2)
+        self.assertEqual(results[0]['recipes_count'], 2)
+
+        response = self.client.get('/api/users/?ordering=following_count')
+        self.assertEqual(
+            [user['id'] for user in response.json()],
+            [self.users[1].id, self.users[0].id, self.users[2].id],
+        )
+
+    def test_stale_save(self):
+        """save() прочитанной ранее модели не затирает счётчики."""
+        recipe = Recipe.objects.get(pk=self.recipes[0].pk)
+        author = CustomUser.objects.get(pk=self.users[0].pk)
+        self.client.post(f'/api/recipes/{recipe.id}/favorite/')
+        self.client.post(f'/api/users/{author.id}/subscribe/')
+
+        recipe.name = 'Новое название'
+        recipe.save()
+        author.first_name = 'Новое имя'
+        author.save()
+
+        recipe.refresh_from_db()
+        author.refresh_from_db()
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(author.first_name, 'Новое имя')
+        self.assertEqual(author.followers_count, 1)
+        self.assertCountersActual()
@@ -0,0 +1,104 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import CustomUser
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    RECIPE_IMAGE_WORKERS=0,
+    RECIPE_IMAGE_WIDTHS=(100, 200, 1000),
+    RECIPE_CARD_IMAGE_WIDTH=200,
+)
+class ImageVariantsTestCase(APITestCase):
+    """Уменьшенные копии изображения рецепта и их URL в ответах."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='author@foodgram.ru',
+            username='author',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        cls.tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        cls.ingredient = Ingredient.objects.create(
+            name='Продукт', measurement_unit='г'
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def create_recipe(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 300), '#e26c2d').save(buffer, 'PNG')
+        image = base64.b64encode(buffer.getvalue()).decode()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/recipes/', {
+                'ingredients': [{'id': self.ingredient.id, 'amount': 10}],
+                'tags': [self.tag.id],
+                'image': f'data:image/png;base64,{image}',
+                'name': 'Рецепт',
+                'text': 'Описание',
+                'cooking_time': 10,
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        return Recipe.objects.get(pk=response.data['id'])
+
+    def test_variants(self):
+        recipe = self.create_recipe()
+
+        self.assertEqual(recipe.image_variants['source'], recipe.image.name)
+        self.assertEqual(set(recipe.image_variants), {'source', '100', '200'})
+        for width in (100, 200):
+            variants = recipe.image_variants[str(width)]
+            self.assertEqual(set(variants), {'jpeg', 'webp'})
+            with Image.open(f'{MEDIA_ROOT}/{variants["webp"]}') as image:
+                self.assertEqual(image.size, (width, width * 3 // 4))
+
+    def test_urls(self):
+        recipe = self.create_recipe()
+        card = f'/backend_media/{recipe.image_variants["200"]["jpeg"]}'
+
+        results = self.client.get('/api/recipes/').data['results']
+        self.assertEqual(results[0]['image'], card)
+        self.assertEqual(
+            set(results[0]['image_variants']), {'100', '200'}
+        )
+
+        detail = self.client.get(f'/api/recipes/{recipe.id}/').data
+        self.assertEqual(detail['image'], recipe.image.url)
+
+        response = self.client.post(f'/api/recipes/{recipe.id}/favorite/')
+        self.assertEqual(response.data['image'], card)
+
+    def test_original_until_ready(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            recipe = Recipe.objects.create(
+                author=self.user,
+                name='Рецепт',
+                image='recipes/photo.jpg',
+                text='Описание',
+                cooking_time=10,
+            )
+
+        results = self.client.get('/api/recipes/').data['results']
+        self.assertEqual(results[0]['image'], recipe.image.url)
+        self.assertEqual(results[0]['image_variants'], {})
@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APITestCase
+
+from recipes.models import Recipe, Tag
+from users.models import CustomUser
+
+
+class IndexAuditTestCase(APITestCase):
+    """Фильтр по тегам и команда explainqueries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='user@foodgram.ru',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег{index}', color=f'#00000{index}', slug=f'tag{index}'
+            )
+            for index in range(3)
+        ]
+        cls.recipes = []
+        for index in range(4):
+            recipe = Recipe.objects.create(
+                author=cls.user,
+                name=f'Рецепт{index}',
+                image='recipes/IMG_9553.JPG',
+                text='Описание',
+                cooking_time=10,
+            )
+            recipe.tags.set(cls.tags[:index])
+            cls.recipes.append(recipe)
+
+    def test_tags_filter(self):
+        for query, expected in (
+            ('tags=tag0', [3, 2, 1]),
+            ('tags=tag1&tags=tag2', [3, 2]),
+            ('tags=tag0&tags=tag2', [3, 2, 1]),
+            ('', [3, 2, 1, 0]),
+        ):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/recipes/?{query}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [recipe['id'] for recipe in response.data['results']],
+                    [self.recipes[index].id for index in expected],
+                )
+
+    def explain(self, *args):
+        stdout = StringIO()
+        call_command('explainqueries', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_explain(self):
+        output = self.explain('/api/users/', '--threshold', '0')
+        self.assertIn('GET /api/users/ - 200', output)
+        self.assertIn('полный просмотр', output)
+
+        output = self.explain('--threshold', '1000000', '--strict')
+        self.assertIn('GET /api/users/subscriptions/', output)
+        self.assertNotIn('полный просмотр', output)
+
+        with self.assertRaises(CommandError):
+            self.explain('/api/users/', '--threshold', '0', '--strict')
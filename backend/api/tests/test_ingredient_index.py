@@ -0,0 +1,56 @@
+from rest_framework.test import APITestCase
+
+from api.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+
+
+class IngredientIndexTestCase(APITestCase):
+    """Поиск ингредиентов по индексу в памяти процесса."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('Продукт 1', 'Продукт 2', 'Сухой продукт', 'Соль'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def setUp(self):
+        ingredient_index.invalidate()
+        self.addCleanup(ingredient_index.invalidate)
+
+    def search(self, name):
+        response = self.client.get('/api/ingredients/', {'name': name})
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.json()]
+
+    def test_prefix_before_substring(self):
+        self.assertEqual(
+            self.search('Продукт'),
+            ['Продукт 1', 'Продукт 2', 'Сухой продукт'],
+        )
+
+    def test_ignores_case(self):
+        self.assertEqual(self.search('продукт 1'), ['Продукт 1'])
+        self.assertEqual(self.search('СОЛЬ'), ['Соль'])
+
+    def test_no_match(self):
+        self.assertEqual(self.search('Нет такого'), [])
+
+    def test_rebuilt_by_signal(self):
+        # Метка версии передаётся одна и та же: индекс перестраивается
+        # только потому, что сигнал invalidate_ingredient_index его сбросил.
+        def search(name):
+            return [
+                item['name']
+                for item in ingredient_index.search(name, version=1.0)
+            ]
+
+        self.assertEqual(search('перец'), [])
+
+        pepper = Ingredient.objects.create(name='Перец', measurement_unit='г')
+        self.assertEqual(search('перец'), ['Перец'])
+
+        pepper.name = 'Перец чёрный'
+        pepper.save()
+        self.assertEqual(search('перец'), ['Перец чёрный'])
+
+        pepper.delete()
+        self.assertEqual(search('перец'), [])
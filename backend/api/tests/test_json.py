@@ -0,0 +1,60 @@
+import io
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+DATA = {
+    'id': 1,
+    'name': 'Борщ\u2028с "кавычками"\u2029\n',
+    'created': datetime(2026, 10, 18, 6, 29, 1, 123456, tzinfo=timezone.utc),
+    'price': Decimal('1.50'),
+    'detail': gettext_lazy('Not found.'),
+    'errors': {1: ['Тег не найден']},
+    'tags': [{'id': 1, 'slug': 'tag'}],
+    'rating': 4.5,
+    'empty': None,
+}
+
+
+class FastJSONTestCase(SimpleTestCase):
+    """FastJSONRenderer и FastJSONParser работают как стандартные."""
+
+    def test_render(self):
+        for media_type in ('application/json', 'application/json; indent=4'):
+            with self.subTest(media_type=media_type):
+                self.assertEqual(
+                    FastJSONRenderer().render(DATA, media_type),
+                    JSONRenderer().render(DATA, media_type),
+                )
+
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_parse(self):
+        content = JSONRenderer().render(DATA)
+
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(content)),
+            JSONParser().parse(io.BytesIO(content)),
+        )
+        for content in (b'{"id": ', b'{"value": NaN}'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(content))
+
+    def test_without_orjson(self):
+        content = JSONRenderer().render(DATA)
+
+        with mock.patch('api.renderers.orjson', None), \
+                mock.patch('api.parsers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(DATA), content)
+            self.assertEqual(
+                FastJSONParser().parse(io.BytesIO(content))['id'], 1
+            )
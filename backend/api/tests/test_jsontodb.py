@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from recipes.models import Ingredient
+
+INGREDIENTS = [
+    {'name': f'продукт {index}', 'measurement_unit': 'г'}
+    for index in range(50)
+]
+
+
+class JsonToDbTestCase(TestCase):
+    """Потоковый импорт ингредиентов командой jsontodb."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def load(self, path, *args):
+        stdout = StringIO()
+        call_command(
+            'jsontodb', '--path', path, *args,
+            verbosity=0, stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def ingredients(self):
+        return set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        )
+
+    def test_chunk_boundaries(self):
+        path = self.write(
+            'ingredients.json', json.dumps(INGREDIENTS, ensure_ascii=False)
+        )
+        expected = {
+            (item['name'], item['measurement_unit']) for item in INGREDIENTS
+        }
+
+        for chunk_size in (1, 7, 64 * 1024):
+            with self.subTest(chunk_size=chunk_size), mock.patch(
+                'recipes.management.commands.jsontodb.CHUNK_SIZE', chunk_size
+            ):
+                Ingredient.objects.all().delete()
+                self.load(path, '--batch-size', '8')
+                self.assertEqual(self.ingredients(), expected)
+
+        # Повторная загрузка не создаёт дубликатов.
+        self.load(path)
+        self.assertEqual(Ingredient.objects.count(), len(INGREDIENTS))
+
+    def test_empty_array(self):
+        self.load(self.write('empty.json', ' [ ]\n'))
+        self.assertEqual(Ingredient.objects.count(), 0)
+
+    def test_malformed_json(self):
+        item = '{"name": "соль", "measurement_unit": "г"}'
+        for content in (
+            '',
+            f'{item}',
+            f'[{item}, {item}',
+            f'[{item} {item}]',
+            f'[{item},]',
+            f'[{item}] []',
+            f'[{item}, {{"name": "соль"',
+            '[1, 2]',
+            '[{"name": "соль"}]',
+            '[{"name": 1, "measurement_unit": "г"}]',
+        ):
+            for chunk_size in (3, 64 * 1024):
+                with self.subTest(content=content, chunk_size=chunk_size):
+                    path = self.write('bad.json', content)
+                    with mock.patch(
+                        'recipes.management.commands.jsontodb.CHUNK_SIZE',
+                        chunk_size,
+                    ), self.assertRaises(CommandError):
+                        self.load(path)
+                    self.assertEqual(Ingredient.objects.count(), 0)
+
+    def test_csv(self):
+        path = self.write('ingredients.csv', 'соль,г\n\nмолоко,мл\n')
+        self.load(path)
+        self.assertEqual(self.ingredients(), {('соль', 'г'), ('молоко', 'мл')})
+
+        path = self.write('bad.csv', 'сахар,г\nмука\n')
+        with self.assertRaisesMessage(CommandError, 'Строка 2'):
+            self.load(path)
+        self.assertFalse(Ingredient.objects.filter(name='сахар').exists())
+
+    def test_dry_run(self):
+        path = self.write('ingredients.csv', 'соль,г\nмолоко,мл\n')
+
+        output = self.load(path, '--dry-run')
+
+        self.assertIn('добавлено 2', output)
+        self.assertEqual(Ingredient.objects.count(), 0)
+
+    def test_upsert(self):
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        Ingredient.objects.create(name='сахар', measurement_unit='г')
+        Ingredient.objects.create(name='сахар', measurement_unit='кг')
+        path = self.write(
+            'ingredients.csv', 'соль,щепотка\nсахар,ложка\nмолоко,мл\n'
+        )
+
+        self.load(path)
+        self.assertEqual(Ingredient.objects.count(), 6)
+
+        Ingredient.objects.filter(
+            measurement_unit__in=('щепотка', 'ложка', 'мл')
+        ).delete()
+        output = self.load(path, '--upsert')
+
+        self.assertIn('обновлено 1', output)
+        self.assertEqual(self.ingredients(), {
+            ('соль', 'щепотка'),
+            # Название встречается в базе дважды - вставка новой записи.
+            ('сахар', 'г'), ('сахар', 'кг'), ('сахар', 'ложка'),
+            ('молоко', 'мл'),
+        })
+
+    def test_version_shared_between_processes(self):
+        """Импорт с собственным кэшем (отдельный процесс) меняет ETag
+        и индекс ингредиентов в процессе веб-сервера."""
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        response = self.client.get('/api/ingredients/', {'name': 'са'})
+        self.assertEqual(response.json(), [])
+        path = self.write('ingredients.json', json.dumps(
+            [{'name': 'сахар', 'measurement_unit': 'г'}], ensure_ascii=False
+        ))
+
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'jsontodb',
+        }}):
+            self.load(path)
+
+        modified = self.client.get(
+            '/api/ingredients/', {'name': 'са'},
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(modified.status_code, 200)
+        self.assertNotEqual(modified['ETag'], response['ETag'])
+        self.assertEqual(
+            [item['name'] for item in modified.json()], ['сахар']
+        )
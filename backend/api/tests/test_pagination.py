@@ -0,0 +1,243 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api.pagination import CountingPaginator
+from recipes.models import Favorite, Recipe
+from users.models import CustomUser
+
+RECIPES_COUNT = 7
+
+
+@override_settings(PAGINATION_COUNT_CACHE_TTL=0, RESPONSE_CACHE_TTL=0)
+class PaginationTestCase(APITestCase):
+    """Постраничная пагинация и пагинация по курсору."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='user@foodgram.ru',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.user,
+                name='Суп' if index % 2 else f'Рецепт {index}',
+                image='recipes/IMG_9553.JPG',
+                text='Описание' if index % 3 else 'Суп и гарнир',
+                cooking_time=10,
+            )
+            for index in range(RECIPES_COUNT)
+        ]
+        # Одинаковая дата: порядок задаёт только id.
+        Recipe.objects.update(pub_date=cls.recipes[0].pub_date)
+
+    def ids(self, response):
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += self.ids(response)
+            url = response.json()['next']
+        return ids
+
+    def test_cursor_pages(self):
+        expected = [recipe.id for recipe in reversed(self.recipes)]
+
+        self.assertEqual(
+            self.walk('/api/recipes/?pagination=cursor&limit=2'), expected
+        )
+        self.assertEqual(self.walk('/api/recipes/?limit=2'), expected)
+
+    def test_cursor_previous(self):
+        first = self.client.get('/api/recipes/?pagination=cursor&limit=3')
+        second = self.client.get(first.json()['next'])
+        previous = self.client.get(second.json()['previous'])
+
+        self.assertEqual(self.ids(previous), self.ids(first))
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/recipes/?cursor=bad')
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_search(self):
+        response = self.client.get(
+            '/api/recipes/?search=суп&pagination=cursor'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pagination', response.json())
+
+        # Явная сортировка вместо релевантности совместима с курсором.
+        response = self.client.get(
+            '/api/recipes/?search=суп&ordering=-pub_date&pagination=cursor'
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class CountingPaginatorTestCase(APITestCase):
+    """Кэшируемый и оценочный count в CustomPagination."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='user@foodgram.ru',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        for index in range(RECIPES_COUNT):
+            cls.create_recipe(index)
+
+    @classmethod
+    def create_recipe(cls, index):
+        return Recipe.objects.create(
+            author=cls.user,
+            name=f'Рецепт {index}',
+            image='recipes/IMG_9553.JPG',
+            text='Описание',
+            cooking_time=10,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        counts = [
+            query['sql'] for query in context.captured_queries
+            if 'COUNT(' in query['sql']
+        ]
+
+        return response.json(), len(counts)
+
+    @override_settings(PAGINATION_COUNT_CACHE_TTL=0)
+    def test_exact_count(self):
+        data, counts = self.get('/api/recipes/?page=1&limit=3')
+
+        self.assertEqual(data['count'], RECIPES_COUNT)
+        self.assertTrue(data['count_is_exact'])
+        self.assertEqual(counts, 1)
+
+    @override_settings(PAGINATION_COUNT_CACHE_TTL=60)
+    def test_cached_count(self):
+        data, counts = self.get('/api/recipes/?limit=3')
+        self.assertEqual(counts, 1)
+        self.assertTrue(data['count_is_exact'])
+
+        data, counts = self.get('/api/recipes/?limit=3')
+        self.assertEqual(counts, 0)
+        self.assertEqual(data['count'], RECIPES_COUNT)
+        self.assertFalse(data['count_is_exact'])
+
+        # Другой фильтр - другой ключ кэша.
+        data, counts = self.get(f'/api/recipes/?limit=3&author={self.user.id}')
+        self.assertEqual(counts, 1)
+
+    @override_settings(PAGINATION_COUNT_CACHE_TTL=60)
+    def test_cached_count_shared_by_users(self):
+        other = CustomUser.objects.create_user(
+            email='other@foodgram.ru',
+            username='other',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        Favorite.objects.create(user=other, recipe=Recipe.objects.first())
+        url = f'/api/recipes/?limit=3&author={self.user.id}'
+        _, counts = self.get(url)
+        self.assertEqual(counts, 1)
+
+        # Флаги пользователя в аннотациях не делят ключ кэша.
+        self.client.force_authenticate(other)
+        data, counts = self.get(url)
+        self.assertEqual(counts, 0)
+        self.assertEqual(data['count'], RECIPES_COUNT)
+
+        # Фильтр по избранному зависит от пользователя и входит в ключ.
+        data, counts = self.get('/api/recipes/?limit=3&is_favorited=1')
+        self.assertEqual((data['count'], counts), (1, 1))
+        self.client.force_authenticate(self.user)
+        data, counts = self.get('/api/recipes/?limit=3&is_favorited=1')
+        self.assertEqual((data['count'], counts), (0, 1))
+
+    @override_settings(PAGINATION_COUNT_CACHE_TTL=60)
+    def test_stale_count_has_next(self):
+        page = RECIPES_COUNT // 2 + 1
+        url = f'/api/recipes/?limit=2&page={page}'
+        data, _ = self.get(url)
+        self.assertIsNone(data['next'])
+
+        self.create_recipe(RECIPES_COUNT)
+        self.create_recipe(RECIPES_COUNT + 1)
+        data, counts = self.get(url)
+
+        # count из кэша устарел, но следующая страница видна.
+        self.assertEqual(counts, 0)
+        self.assertEqual(data['count'], RECIPES_COUNT)
+        self.assertIsNotNone(data['next'])
+
+    @override_settings(PAGINATION_COUNT_CACHE_TTL=0)
+    def test_empty_pages(self):
+        for page in ('0', 'abc', str(RECIPES_COUNT + 1)):
+            with self.subTest(page=page):
+                response = self.client.get(
+                    f'/api/recipes/?limit=1&page={page}'
+                )
+                self.assertEqual(response.status_code, 404)
+
+        data, _ = self.get('/api/recipes/?page=1&is_favorited=1')
+        self.assertEqual(data['results'], [])
+        self.assertEqual(data['count'], 0)
+
+    @override_settings(PAGINATION_ESTIMATE_THRESHOLD=1000)
+    def test_estimate(self):
+        fake = mock.MagicMock(vendor='postgresql')
+        cursor = fake.cursor.return_value.__enter__.return_value
+        paginator = CountingPaginator(Recipe.objects.all(), 3)
+
+        with mock.patch('api.pagination.connections', {'default': fake}):
+            cursor.fetchone.return_value = (250000,)
+            self.assertEqual(paginator.count, 250000)
+            self.assertFalse(paginator.count_is_exact)
+            self.assertEqual(
+                cursor.execute.call_args[0][1], ['recipes_recipe']
+            )
+
+            # Маленькая таблица и фильтры - точный подсчёт.
+            cursor.fetchone.return_value = (10,)
+            self.assertIsNone(
+                paginator.estimate_count(Recipe.objects.all())
+            )
+            cursor.fetchone.return_value = (250000,)
+            self.assertIsNone(paginator.estimate_count(
+                Recipe.objects.filter(author=self.user)
+            ))
+
+        # Не PostgreSQL - оценка не используется.
+        self.assertIsNone(paginator.estimate_count(Recipe.objects.all()))
+
+    @override_settings(PAGINATION_COUNT_CACHE_TTL=0)
+    def test_estimate_in_response(self):
+        with mock.patch.object(
+            CountingPaginator, 'estimate_count', return_value=250000
+        ):
+            data, counts = self.get('/api/recipes/?limit=3')
+
+        self.assertEqual(data['count'], 250000)
+        self.assertFalse(data['count_is_exact'])
+        self.assertEqual(counts, 0)
+        self.assertIsNotNone(data['next'])
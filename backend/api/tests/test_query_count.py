@@ -0,0 +1,302 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from api.ingredient_index import ingredient_index
+from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
+                            ShoppingCart, Tag)
+from users.models import CustomUser, Subscribe
+
+PAGE_SIZES = (1, 5, 20)
+
+USERS_COUNT = 8
+RECIPES_COUNT = 40
+INGREDIENTS_COUNT = 60
+INGREDIENTS_PER_RECIPE = 6
+
+RECIPE_LIST_BUDGET = 6
+RECIPE_DETAIL_BUDGET = 5
+SUBSCRIPTIONS_BUDGET = 4
+USER_LIST_BUDGET = 3
+USER_DETAIL_BUDGET = 3
+TAG_LIST_BUDGET = 2
+INGREDIENT_SEARCH_BUDGET = 1
+SHOPPING_CART_BUDGET = 2
+NOT_MODIFIED_BUDGET = 1
+
+
+@override_settings(PAGINATION_COUNT_CACHE_TTL=0, RESPONSE_CACHE_TTL=0)
+class QueryCountTestCase(APITestCase):
+    """Бюджеты SQL-запросов для эндпоинтов API.
+
+    Каждый эндпоинт запрашивается с разным размером страницы (или с разным
+    объёмом данных), количество запросов не должно зависеть от него
+    и не должно превышать бюджет.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create_user(
+                email=f'user{index}@foodgram.ru',
+                username=f'user{index}',
+                first_name=f'Имя{index}',
+                last_name=f'Фамилия{index}',
+                password='foodgram-password',
+            )
+            for index in range(USERS_COUNT)
+        ]
+        cls.user = cls.users[0]
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег{index}', color=f'#00000{index}', slug=f'tag{index}'
+            )
+            for index in range(3)
+        ]
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Продукт {index}', measurement_unit='г')
+            for index in range(INGREDIENTS_COUNT)
+        )
+        cls.ingredients = list(Ingredient.objects.all())
+
+        for index in range(RECIPES_COUNT):
+            recipe = Recipe.objects.create(
+                name=f'Рецепт {index}',
+                author=cls.users[1 + index % (USERS_COUNT - 1)],
+                image='recipes/IMG_9553.JPG',
+                text='Описание рецепта ' * 20,
+                cooking_time=10 + index,
+            )
+            recipe.tags.set(cls.tags[:1 + index % len(cls.tags)])
+            IngredientsInRecipe.objects.bulk_create(
+                IngredientsInRecipe(
+                    recipe=recipe,
+                    ingredient=cls.ingredients[
+                        (index + offset) % INGREDIENTS_COUNT
+                    ],
+                    amount=offset + 1,
+                )
+                for offset in range(INGREDIENTS_PER_RECIPE)
+            )
+
+            if index % 2:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+            if index % 3:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+        for author in cls.users[1:]:
+            Subscribe.objects.create(user=cls.user, author=author)
+
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        ingredient_index.invalidate()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.anonymous_client = APIClient()
+
+    def count_queries(self, url, client=None, expected_status=200):
+        client = client or self.client
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+
+        self.assertEqual(response.status_code, expected_status, url)
+
+        return len(context.captured_queries), response
+
+    def assertQueryBudget(self, urls, budget, client=None):
+        counts = {}
+
+        for url in urls:
+            counts[url], _ = self.count_queries(url, client)
+
+        self.assertLessEqual(max(counts.values()), budget, counts)
+        self.assertEqual(len(set(counts.values())), 1, counts)
+
+    def assertPageSizes(self, url, budget, client=None):
+        """Проверяет бюджет на нескольких полных страницах выдачи."""
+        separator = '&' if '?' in url else '?'
+        urls = [f'{url}{separator}limit={size}' for size in PAGE_SIZES]
+
+        for size, page_url in zip(PAGE_SIZES, urls):
+            _, response = self.count_queries(page_url, client)
+            self.assertEqual(len(response.data['results']), size, page_url)
+
+        self.assertQueryBudget(urls, budget, client)
+
+    def test_recipe_list(self):
+        self.assertPageSizes('/api/recipes/', RECIPE_LIST_BUDGET)
+
+    def test_recipe_list_cursor(self):
+        self.assertPageSizes(
+            '/api/recipes/?pagination=cursor', RECIPE_LIST_BUDGET - 1
+        )
+        _, response = self.count_queries(
+            f'/api/recipes/?pagination=cursor&limit={PAGE_SIZES[-1]}'
+        )
+        self.assertNotIn('count', response.data)
+        self.assertQueryBudget(
+            [response.data['next']], RECIPE_LIST_BUDGET - 1
+        )
+
+    def test_recipe_list_anonymous(self):
+        self.assertPageSizes(
+            '/api/recipes/', RECIPE_LIST_BUDGET, self.anonymous_client
+        )
+
+    def test_recipe_list_filters(self):
+        # Фильтры по тегам и автору проверяют значения одним запросом.
+        filters = (
+            ('is_favorited=1', RECIPE_LIST_BUDGET),
+            ('is_in_shopping_cart=1', RECIPE_LIST_BUDGET),
+            ('search=Рецепт', RECIPE_LIST_BUDGET),
+            ('tags=tag0', RECIPE_LIST_BUDGET + 1),
+            ('tags=tag1&tags=tag2', RECIPE_LIST_BUDGET + 1),
+            (f'author={self.users[1].id}', RECIPE_LIST_BUDGET + 1),
+            ('is_favorited=1&tags=tag0&tags=tag1', RECIPE_LIST_BUDGET + 1),
+        )
+
+        for query, budget in filters:
+            with self.subTest(query=query):
+                urls = [
+                    f'/api/recipes/?{query}&limit={size}'
+                    for size in PAGE_SIZES
+                ]
+                self.assertQueryBudget(urls, budget)
+
+    def test_recipe_detail(self):
+        recipes = Recipe.objects.order_by('id')[:3]
+        urls = [f'/api/recipes/{recipe.id}/' for recipe in recipes]
+
+        self.assertQueryBudget(urls, RECIPE_DETAIL_BUDGET)
+        self.assertQueryBudget(
+            urls, RECIPE_DETAIL_BUDGET, self.anonymous_client
+        )
+
+    def test_subscriptions(self):
+        # Подписок меньше, чем PAGE_SIZES[-1], поэтому размеры страниц
+        # ограничены их числом.
+        for recipes_limit in (0, 1, 3, 10):
+            with self.subTest(recipes_limit=recipes_limit):
+                urls = [
+                    '/api/users/subscriptions/'
+                    f'?recipes_limit={recipes_limit}&limit={size}'
+                    for size in (1, 3, USERS_COUNT - 1)
+                ]
+                self.assertQueryBudget(urls, SUBSCRIPTIONS_BUDGET)
+
+    def test_subscriptions_cursor(self):
+        urls = [
+            f'/api/users/subscriptions/?pagination=cursor&limit={size}'
+            for size in (1, 3, USERS_COUNT - 1)
+        ]
+
+        self.assertQueryBudget(urls, SUBSCRIPTIONS_BUDGET - 1)
+
+    def test_user_list(self):
+        count_before, _ = self.count_queries('/api/users/')
+        CustomUser.objects.bulk_create(
+            CustomUser(
+                email=f'extra{index}@foodgram.ru',
+                username=f'extra{index}',
+                first_name='Имя',
+                last_name='Фамилия',
+            )
+            for index in range(10)
+        )
+        count_after, _ = self.count_queries('/api/users/')
+
+        self.assertEqual(count_before, count_after)
+        self.assertLessEqual(count_after, USER_LIST_BUDGET)
+
+    def test_user_detail(self):
+        urls = [f'/api/users/{user.id}/' for user in self.users[:3]]
+
+        self.assertQueryBudget(urls, USER_DETAIL_BUDGET)
+        self.assertQueryBudget(['/api/users/me/'], USER_DETAIL_BUDGET)
+
+    def test_tag_list(self):
+        self.assertQueryBudget(
+            ['/api/tags/'], TAG_LIST_BUDGET, self.anonymous_client
+        )
+
+    def test_ingredient_search(self):
+        # Первый запрос строит индекс ингредиентов в памяти процесса.
+        self.count_queries('/api/ingredients/', self.anonymous_client)
+        urls = (
+            '/api/ingredients/?name=Продукт 1',
+            '/api/ingredients/?name=Продукт',
+            '/api/ingredients/?name=дукт',
+            '/api/ingredients/?name=Нет такого',
+        )
+
+        self.assertQueryBudget(
+            urls, INGREDIENT_SEARCH_BUDGET, self.anonymous_client
+        )
+
+    def test_reference_not_modified(self):
+        urls = (
+            '/api/tags/',
+            f'/api/tags/{self.tags[0].id}/',
+            '/api/ingredients/',
+            '/api/ingredients/?name=Продукт',
+            f'/api/ingredients/{self.ingredients[0].id}/',
+        )
+
+        for url in urls:
+            with self.subTest(url=url):
+                _, response = self.count_queries(url)
+                with CaptureQueriesContext(connection) as context:
+                    not_modified = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertLessEqual(
+                    len(context.captured_queries), NOT_MODIFIED_BUDGET
+                )
+                self.assertIn('max-age', response['Cache-Control'])
+
+        _, response = self.count_queries('/api/tags/')
+        Tag.objects.create(name='новый', color='#123456', slug='new')
+        modified = self.client.get(
+            '/api/tags/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(modified.status_code, 200)
+        self.assertEqual(len(modified.data), len(self.tags) + 1)
+
+    def shopping_cart_clients(self):
+        clients = [self.client]
+
+        for cart_size, user in zip((0, 1, 10), self.users[1:]):
+            for recipe in Recipe.objects.all()[:cart_size]:
+                ShoppingCart.objects.create(user=user, recipe=recipe)
+            client = APIClient()
+            token = Token.objects.create(user=user)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+            clients.append(client)
+
+        return clients
+
+    def test_download_shopping_cart(self):
+        url = '/api/recipes/download_shopping_cart/'
+        counts = [
+            self.count_queries(url, client)[0]
+            for client in self.shopping_cart_clients()
+        ]
+
+        self.assertLessEqual(max(counts), SHOPPING_CART_BUDGET, counts)
+        self.assertEqual(len(set(counts)), 1, counts)
+
+    def test_shopping_cart_summary(self):
+        url = '/api/recipes/shopping_cart_summary/'
+        counts = [
+            self.count_queries(url, client)[0]
+            for client in self.shopping_cart_clients()
+        ]
+
+        self.assertLessEqual(max(counts), SHOPPING_CART_BUDGET, counts)
+        self.assertEqual(len(set(counts)), 1, counts)
@@ -0,0 +1,100 @@
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api.serializers import RecipeReadSerializer, RecipeSerializer
+from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
+                            ShoppingCart, Tag)
+from users.models import CustomUser, Subscribe
+
+
+class RecipeReadSerializerTestCase(APITestCase):
+    """RecipeReadSerializer отдаёт тот же JSON, что и RecipeSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create_user(
+                email=f'user{index}@foodgram.ru',
+                username=f'user{index}',
+                first_name=f'Имя{index}',
+                last_name=f'Фамилия{index}',
+                password='foodgram-password',
+            )
+            for index in range(3)
+        ]
+        tags = [
+            Tag.objects.create(
+                name=f'Тег{index}', color=f'#00000{index}', slug=f'tag{index}'
+            )
+            for index in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент{index}', measurement_unit='г'
+            )
+            for index in range(5)
+        ]
+        for index in range(6):
+            recipe = Recipe.objects.create(
+                author=cls.users[index % 3],
+                name=f'Рецепт{index}',
+                image='recipes/IMG_9553.JPG',
+                text='Описание\n' * index,
+                cooking_time=10 + index,
+            )
+            recipe.tags.set(tags[:index % 3 + 1])
+            for offset in range(index % 4):
+                IngredientsInRecipe.objects.create(
+                    recipe=recipe,
+                    ingredient=ingredients[(index + offset) % 5],
+                    amount=offset + 1,
+                )
+            if index % 2:
+                Favorite.objects.create(user=cls.users[0], recipe=recipe)
+            if index % 3:
+                ShoppingCart.objects.create(user=cls.users[0], recipe=recipe)
+        Recipe.objects.filter(name='Рецепт1').update(image_variants={
+            'source': 'recipes/IMG_9553.JPG',
+            '320': {
+                'jpeg': 'recipes/variants/IMG_9553-320.jpg',
+                'webp': 'recipes/variants/IMG_9553-320.webp',
+            },
+        })
+        Subscribe.objects.create(user=cls.users[0], author=cls.users[1])
+
+    def request(self, user):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+
+        return request
+
+    def assertSameJSON(self, recipes, context):
+        renderer = JSONRenderer()
+        expected = RecipeSerializer(recipes, many=True, context=context).data
+        actual = RecipeReadSerializer(
+            recipes, many=True, context=context
+        ).data
+
+        self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_same_output(self):
+        for user in (self.users[0], AnonymousUser()):
+            for image_width in (None, 320):
+                with self.subTest(user=user, image_width=image_width):
+                    context = {
+                        'request': self.request(user),
+                        'image_width': image_width,
+                    }
+                    self.assertSameJSON(
+                        list(Recipe.objects.with_related().with_user_flags(
+                            user
+                        )),
+                        context,
+                    )
+                    # Без аннотаций флаги считаются запросами.
+                    self.assertSameJSON(list(Recipe.objects.all()), context)
+
+    def test_without_request(self):
+        self.assertSameJSON(list(Recipe.objects.with_related()), {})
@@ -0,0 +1,90 @@
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient, IngredientsInRecipe, Recipe, Tag
+from users.models import CustomUser
+
+
+class RecipeUpdateTestCase(APITestCase):
+    """PATCH рецепта меняет только то, что действительно изменилось."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='author@foodgram.ru',
+            username='author',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег{index}', color=f'#00000{index}', slug=f'tag{index}'
+            )
+            for index in range(2)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент{index}', measurement_unit='г'
+            )
+            for index in range(2)
+        ]
+        cls.recipe = Recipe.objects.create(
+            author=cls.user,
+            name='Рецепт',
+            image='recipes/IMG_9553.JPG',
+            text='Описание',
+            cooking_time=10,
+        )
+        cls.recipe.tags.set([cls.tags[0]])
+        cls.item = IngredientsInRecipe.objects.create(
+            recipe=cls.recipe, ingredient=cls.ingredients[0], amount=10
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/recipes/{self.recipe.id}/'
+
+    def patch(self, data):
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        return response.json()
+
+    def items(self):
+        return list(IngredientsInRecipe.objects.filter(
+            recipe=self.recipe
+        ).values_list('id', 'ingredient', 'amount'))
+
+    def test_partial(self):
+        data = self.patch({'name': 'Новое название'})
+
+        self.assertEqual(data['name'], 'Новое название')
+        self.assertEqual(
+            self.items(), [(self.item.id, self.ingredients[0].id, 10)]
+        )
+        self.assertEqual(
+            [tag['id'] for tag in data['tags']], [self.tags[0].id]
+        )
+
+    def test_amount_updated_in_place(self):
+        self.patch({
+            'ingredients': [{'id': self.ingredients[0].id, 'amount': 25}],
+        })
+
+        self.assertEqual(
+            self.items(), [(self.item.id, self.ingredients[0].id, 25)]
+        )
+
+    def test_replace(self):
+        data = self.patch({
+            'ingredients': [{'id': self.ingredients[1].id, 'amount': 5}],
+            'tags': [self.tags[1].id],
+        })
+
+        self.assertEqual(
+            [(ingredient, amount) for _, ingredient, amount in self.items()],
+            [(self.ingredients[1].id, 5)],
+        )
+        self.assertEqual(
+            [tag['id'] for tag in data['tags']], [self.tags[1].id]
+        )
@@ -0,0 +1,107 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient, Tag
+from users.models import CustomUser
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeValidationTestCase(APITestCase):
+    """Проверка id ингредиентов и тегов при создании рецепта."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='author@foodgram.ru',
+            username='author',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег{index}', color=f'#00000{index}', slug=f'tag{index}'
+            )
+            for index in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент{index}', measurement_unit='г'
+            )
+            for index in range(30)
+        ]
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, 'PNG')
+        cls.image = (
+            'data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode()
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def post(self, ingredient_ids, tag_ids):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/recipes/', {
+                'ingredients': [
+                    {'id': pk, 'amount': 10} for pk in ingredient_ids
+                ],
+                'tags': tag_ids,
+                'image': self.image,
+                'name': 'Рецепт',
+                'text': 'Описание',
+                'cooking_time': 10,
+            }, format='json')
+
+        return response, len(context.captured_queries)
+
+    def test_queries_do_not_grow(self):
+        counts = []
+        for size in (1, 10, 30):
+            response, queries = self.post(
+                [ingredient.id for ingredient in self.ingredients[:size]],
+                [tag.id for tag in self.tags[:1 + size % 3]],
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(len(response.data['ingredients']), size)
+            counts.append(queries)
+
+        self.assertEqual(len(set(counts)), 1, counts)
+
+    def test_per_item_errors(self):
+        first, second = self.ingredients[0].id, self.ingredients[1].id
+
+        response, queries = self.post(
+            [first, 999999, second, first],
+            [self.tags[0].id, 999999, self.tags[0].id],
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            'ingredients': [
+                {},
+                {'id': ['Ингредиент не найден']},
+                {},
+                {'id': ['Такой ингредиент уже есть']},
+            ],
+            'tags': {
+                '1': ['Тег не найден'],
+                '2': ['Теги должны быть уникальными'],
+            },
+        })
+        self.assertEqual(queries, 2)
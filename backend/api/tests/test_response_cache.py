@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APITestCase
+
+from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
+                            Tag)
+from users.models import CustomUser
+
+
+class ResponseCacheTestCase(APITestCase):
+    """Кэш ответов для анонимных пользователей и его сброс сигналами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(
+            email='author@foodgram.ru',
+            username='author',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        cls.tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        cls.ingredient = Ingredient.objects.create(
+            name='Продукт', measurement_unit='г'
+        )
+        cls.recipes = []
+        for index in range(2):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f'Рецепт{index}',
+                image='recipes/IMG_9553.JPG',
+                text='Описание',
+                cooking_time=10,
+            )
+            recipe.tags.set([cls.tag])
+            IngredientsInRecipe.objects.create(
+                recipe=recipe, ingredient=cls.ingredient, amount=1
+            )
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.url = f'/api/recipes/{self.recipes[0].id}/'
+
+    def get(self, url, client=None):
+        with CaptureQueriesContext(connection) as context:
+            response = (client or self.client).get(url)
+        self.assertEqual(response.status_code, 200)
+
+        return response.data, len(context.captured_queries)
+
+    def assertCached(self, url):
+        self.get(url)
+        _, queries = self.get(url)
+        self.assertEqual(queries, 0, url)
+
+    def test_cache_hit(self):
+        for url in (self.url, '/api/recipes/', '/api/recipes/?limit=1'):
+            self.assertCached(url)
+
+    def test_query_params_normalized(self):
+        self.get('/api/recipes/?tags=tag&limit=1')
+
+        _, queries = self.get('/api/recipes/?limit=1&tags=tag')
+
+        self.assertEqual(queries, 0)
+
+    def test_authenticated_not_cached(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        self.get(self.url, client)
+
+        _, queries = self.get(self.url, client)
+
+        self.assertGreater(queries, 0)
+
+    def test_invalidation(self):
+        changes = (
+            lambda: Recipe.objects.get(pk=self.recipes[0].pk).save(),
+            lambda: Favorite.objects.create(
+                user=self.author, recipe=self.recipes[0]
+            ),
+            lambda: self.recipes[0].tags.clear(),
+            lambda: IngredientsInRecipe.objects.filter(
+                recipe=self.recipes[0]
+            ).first().delete(),
+            lambda: Tag.objects.filter(pk=self.tag.pk).first().save(),
+            lambda: Ingredient.objects.create(
+                name='Новый', measurement_unit='г'
+            ),
+            lambda: CustomUser.objects.get(pk=self.author.pk).save(),
+        )
+
+        for change in changes:
+            for url in (self.url, '/api/recipes/'):
+                self.assertCached(url)
+            change()
+            for url in (self.url, '/api/recipes/'):
+                _, queries = self.get(url)
+                self.assertGreater(queries, 0, url)
+
+    def test_other_recipe_kept(self):
+        other = f'/api/recipes/{self.recipes[1].id}/'
+        self.assertCached(other)
+
+        Favorite.objects.create(user=self.author, recipe=self.recipes[0])
+
+        _, queries = self.get(other)
+        self.assertEqual(queries, 0)
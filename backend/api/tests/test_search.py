@@ -0,0 +1,78 @@
+import unittest
+
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from recipes.models import Recipe
+from users.models import CustomUser
+
+
+class SearchTestCase(APITestCase):
+    """Параметр ?search= в списке рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='user@foodgram.ru',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        # Совпадение только в описании у более нового рецепта: без
+        # ранжирования он шёл бы первым.
+        cls.in_name = cls.create_recipe('борщ красный', 'свёкла и капуста')
+        cls.in_text = cls.create_recipe('суп дня', 'почти как борщ')
+        cls.other = cls.create_recipe('салат', 'огурцы и помидоры')
+
+    @classmethod
+    def create_recipe(cls, name, text):
+        return Recipe.objects.create(
+            author=cls.user,
+            name=name,
+            image='recipes/IMG_9553.JPG',
+            text=text,
+            cooking_time=10,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def search(self, text):
+        response = self.client.get('/api/recipes/', {'search': text})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_name_and_text(self):
+        self.assertEqual(
+            self.search('борщ'), [self.in_name.id, self.in_text.id]
+        )
+
+    def test_no_match(self):
+        self.assertEqual(self.search('пельмени'), [])
+        self.assertNotIn(self.other.id, self.search('борщ'))
+
+    def test_updated_after_edit(self):
+        self.other.name = 'борщ зелёный'
+        self.other.save()
+        self.in_name.name = 'рагу'
+        self.in_name.text = 'овощи'
+        self.in_name.save()
+
+        self.assertEqual(
+            self.search('борщ'), [self.other.id, self.in_text.id]
+        )
+
+    @unittest.skipUnless(
+        connection.vendor == 'postgresql', 'Полнотекстовый поиск PostgreSQL'
+    )
+    def test_websearch(self):
+        # Словоформы приводятся к основе словарём russian.
+        self.assertEqual(
+            self.search('борщи'), [self.in_name.id, self.in_text.id]
+        )
+        # Синтаксис websearch: исключение слова.
+        self.assertEqual(self.search('борщ -капуста'), [self.in_text.id])
+        self.assertEqual(self.search('"борщ красный"'), [self.in_name.id])
@@ -0,0 +1,165 @@
+import threading
+import unittest
+
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TransactionTestCase
+from rest_framework.test import APITestCase
+
+from recipes.models import (Ingredient, IngredientsInRecipe, Recipe,
+                            ShoppingCart, ShoppingListItem)
+from recipes.shopping_list import refresh_recipe_in_shopping_lists
+from recipes.user_recipes import add_recipes
+from users.models import CustomUser
+
+
+class ShoppingListTestCase(APITestCase):
+    """ShoppingListItem совпадает с агрегатом, посчитанным с нуля."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create_user(
+                email=f'user{index}@foodgram.ru',
+                username=f'user{index}',
+                first_name=f'Имя{index}',
+                last_name=f'Фамилия{index}',
+                password='foodgram-password',
+            )
+            for index in range(2)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент{index}', measurement_unit='г'
+            )
+            for index in range(5)
+        ]
+        cls.recipes = []
+        for index in range(4):
+            recipe = Recipe.objects.create(
+                author=cls.users[1],
+                name=f'Рецепт{index}',
+                image='recipes/IMG_9553.JPG',
+                text='Описание',
+                cooking_time=10,
+            )
+            IngredientsInRecipe.objects.bulk_create(
+                IngredientsInRecipe(
+                    recipe=recipe,
+                    ingredient=cls.ingredients[(index + shift) % 5],
+                    amount=shift + 1,
+                )
+                for shift in range(3)
+            )
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        self.client.force_authenticate(self.users[0])
+
+    def assertShoppingListActual(self):
+        expected = IngredientsInRecipe.objects.filter(
+            recipe__shopping_cart__isnull=False
+        ).values_list(
+            'recipe__shopping_cart__user', 'ingredient'
+        ).annotate(
+            total=Sum('amount')
+        ).order_by()
+        actual = ShoppingListItem.objects.values_list(
+            'user', 'ingredient', 'amount'
+        )
+
+        self.assertEqual(sorted(actual), sorted(expected))
+
+    def test_add_and_delete(self):
+        for recipe in self.recipes[:3]:
+            self.client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+        self.assertShoppingListActual()
+
+        self.client.delete(f'/api/recipes/{self.recipes[1].id}/shopping_cart/')
+        self.assertShoppingListActual()
+
+    def test_recipe_changes(self):
+        for user in self.users:
+            for recipe in self.recipes[:2]:
+                ShoppingCart.objects.create(user=user, recipe=recipe)
+
+        recipe = self.recipes[0]
+        ingredient_ids = {
+            item.ingredient_id for item in recipe.ingredient_in_recipe.all()
+        }
+        recipe.ingredient_in_recipe.all().delete()
+        IngredientsInRecipe.objects.create(
+            recipe=recipe, ingredient=self.ingredients[4], amount=100
+        )
+        refresh_recipe_in_shopping_lists(
+            recipe.id, ingredient_ids | {self.ingredients[4].id}
+        )
+        self.assertShoppingListActual()
+
+        self.recipes[1].delete()
+        self.assertShoppingListActual()
+
+    def test_summary(self):
+        ShoppingCart.objects.create(user=self.users[0], recipe=self.recipes[0])
+
+        response = self.client.get('/api/recipes/shopping_cart_summary/')
+
+        self.assertEqual(
+            [(item['name'], item['amount']) for item in response.json()],
+            [('ингредиент0', 1), ('ингредиент1', 2), ('ингредиент2', 3)],
+        )
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql', 'Блокировки строк нужны PostgreSQL'
+)
+class ConcurrentShoppingListTestCase(TransactionTestCase):
+    """Одновременные добавления в корзину с общим ингредиентом."""
+
+    def test_concurrent_adds(self):
+        user = CustomUser.objects.create_user(
+            email='user@foodgram.ru',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        ingredient = Ingredient.objects.create(
+            name='ингредиент', measurement_unit='г'
+        )
+        recipes = []
+        for index in range(2):
+            recipe = Recipe.objects.create(
+                author=user,
+                name=f'Рецепт{index}',
+                image='recipes/IMG_9553.JPG',
+                text='Описание',
+                cooking_time=10,
+            )
+            IngredientsInRecipe.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=index + 1
+            )
+            recipes.append(recipe)
+        added = threading.Event()
+
+        def first():
+            try:
+                with transaction.atomic():
+                    add_recipes(ShoppingCart, user, [recipes[0].id])
+                    added.set()
+                    # Второе добавление успевает дойти до пересчёта.
+                    threading.Event().wait(0.5)
+            finally:
+                added.set()
+                connection.close()
+
+        thread = threading.Thread(target=first)
+        thread.start()
+        added.wait()
+        add_recipes(ShoppingCart, user, [recipes[1].id])
+        thread.join()
+
+        self.assertEqual(
+            list(ShoppingListItem.objects.values_list('amount', flat=True)),
+            [3],
+        )
@@ -0,0 +1,129 @@
+import csv
+import io
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient, ShoppingListItem
+from users.models import CustomUser
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingListDownloadTestCase(APITestCase):
+    """Выгрузка списка покупок в txt, csv и json."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='user@foodgram.ru',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        cls.rows = [
+            ('лук', 'г', 200),
+            ('молоко', 'мл', 500),
+            ('соль, крупная', 'щепотка', 1),
+        ]
+        for name, measurement_unit, amount in cls.rows:
+            ShoppingListItem.objects.create(
+                user=cls.user,
+                ingredient=Ingredient.objects.create(
+                    name=name, measurement_unit=measurement_unit
+                ),
+                amount=amount,
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_formats(self):
+        text = self.client.get(URL)
+        self.assertEqual(text['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertEqual(text.content.decode(), '\n'.join(
+            f'{name} - {amount} {unit}' for name, unit, amount in self.rows
+        ))
+
+        table = self.client.get(URL, {'format': 'csv'})
+        self.assertEqual(table['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            list(csv.reader(io.StringIO(table.content.decode()))),
+            [['name', 'measurement_unit', 'amount']] + [
+                [name, unit, str(amount)] for name, unit, amount in self.rows
+            ],
+        )
+
+        data = self.client.get(URL, {'format': 'json'})
+        self.assertEqual(
+            data['Content-Type'], 'application/json; charset=utf-8'
+        )
+        self.assertEqual(data.json(), [
+            {'name': name, 'measurement_unit': unit, 'amount': amount}
+            for name, unit, amount in self.rows
+        ])
+
+        for response, extension in ((text, 'txt'), (table, 'csv'),
+                                    (data, 'json')):
+            with self.subTest(extension=extension):
+                self.assertEqual(
+                    response['Content-Length'], str(len(response.content))
+                )
+                self.assertEqual(
+                    response['Content-Disposition'],
+                    f'attachment; filename="shopping_list.{extension}"',
+                )
+
+    def test_empty(self):
+        ShoppingListItem.objects.all().delete()
+
+        self.assertEqual(self.client.get(URL).content, b'')
+        self.assertEqual(self.client.get(URL, {'format': 'json'}).json(), [])
+
+    def test_etag(self):
+        response = self.client.get(URL)
+        etag = response['ETag']
+
+        self.assertNotEqual(
+            self.client.get(URL, {'format': 'csv'})['ETag'], etag
+        )
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        ShoppingListItem.objects.filter(ingredient__name='лук').update(
+            amount=300
+        )
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_streaming(self):
+        for params in ({}, {'format': 'csv'}, {'format': 'json'}):
+            with self.subTest(**params):
+                buffered = self.client.get(URL, params)
+                with mock.patch('api.views.SHOPPING_LIST_BUFFER_ROWS', 2):
+                    streamed = self.client.get(URL, params)
+
+                self.assertTrue(streamed.streaming)
+                self.assertFalse(streamed.has_header('Content-Length'))
+                self.assertFalse(streamed.has_header('ETag'))
+                self.assertEqual(
+                    streamed['Content-Type'], buffered['Content-Type']
+                )
+                self.assertEqual(
+                    b''.join(streamed.streaming_content), buffered.content
+                )
+
+    def test_errors_are_json(self):
+        response = self.client.get(URL, {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', response.json())
+
+        self.client.force_authenticate(None)
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', response.json())
@@ -0,0 +1,110 @@
+from django.db.models import Sum
+from rest_framework.test import APITestCase
+
+from recipes.counters import rebuild_counters
+from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
+                            ShoppingCart, ShoppingListItem)
+from users.models import CustomUser
+
+
+class UserRecipesTestCase(APITestCase):
+    """Добавление в избранное и список покупок по одному и пачкой."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='user@foodgram.ru',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='foodgram-password',
+        )
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент{index}', measurement_unit='г'
+            )
+            for index in range(3)
+        ]
+        cls.recipes = []
+        for index in range(4):
+            recipe = Recipe.objects.create(
+                author=cls.user,
+                name=f'Рецепт{index}',
+                image='recipes/IMG_9553.JPG',
+                text='Описание',
+                cooking_time=10,
+            )
+            IngredientsInRecipe.objects.create(
+                recipe=recipe, ingredient=ingredients[index % 3], amount=5
+            )
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assertDerivedActual(self):
+        counters = list(Recipe.objects.order_by('id').values_list(
+            'favorites_count', 'shopping_cart_count'
+        ))
+        rebuild_counters()
+        self.assertEqual(counters, list(Recipe.objects.order_by(
+            'id'
+        ).values_list('favorites_count', 'shopping_cart_count')))
+
+        expected = IngredientsInRecipe.objects.filter(
+            recipe__shopping_cart__user=self.user
+        ).values_list('ingredient').annotate(total=Sum('amount')).order_by()
+        self.assertEqual(
+            sorted(ShoppingListItem.objects.values_list(
+                'ingredient', 'amount'
+            )),
+            sorted(expected),
+        )
+
+    def test_single(self):
+        recipe = self.recipes[0]
+        for action in ('favorite', 'shopping_cart'):
+            url = f'/api/recipes/{recipe.id}/{action}/'
+
+            self.assertEqual(self.client.post(url).status_code, 201)
+            self.assertEqual(self.client.post(url).status_code, 400)
+            self.assertDerivedActual()
+            self.assertEqual(self.client.delete(url).status_code, 204)
+            self.assertEqual(self.client.delete(url).status_code, 400)
+            self.assertDerivedActual()
+
+            for method in (self.client.post, self.client.delete):
+                for pk in (0, 'abc'):
+                    response = method(f'/api/recipes/{pk}/{action}/')
+                    self.assertEqual(response.status_code, 404)
+
+    def test_bulk(self):
+        ids = [recipe.id for recipe in self.recipes]
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+
+        for action, model in (
+            ('favorite', Favorite), ('shopping_cart', ShoppingCart)
+        ):
+            url = f'/api/recipes/{action}/'
+
+            response = self.client.post(
+                url, {'recipes': ids[:3] + [999999]}, format='json'
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.json()['recipes'],
+                ids[1:3] if model is Favorite else ids[:3],
+            )
+            self.assertEqual(
+                model.objects.filter(user=self.user).count(), 3
+            )
+            self.assertDerivedActual()
+
+            response = self.client.delete(
+                url, {'recipes': ids[1:]}, format='json'
+            )
+            self.assertEqual(response.json()['recipes'], ids[1:3])
+            self.assertDerivedActual()
+
+            response = self.client.post(url, {'recipes': []}, format='json')
+            self.assertEqual(response.status_code, 400)
@@ -1,34 +1,63 @@
-from django.db.models import Sum
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+import hashlib
+from itertools import chain, islice
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import (SAFE_METHODS, AllowAny,
+                                        IsAuthenticated)
 from rest_framework.response import Response
 from rest_framework.validators import ValidationError
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
-from api.filters import IngredientFilter, RecipeFilter
+from api.conditional import ConditionalGetMixin
+from api.filters import (RecipeFilter, StableOrderingFilter,
+                         complete_ordering)
+from api.ingredient_index import ingredient_index
 from api.pagination import CustomPagination
 from api.permissions import IsAuthorOrAdminOnly
+from api.response_cache import AnonymousCacheMixin
+from api.renderers import (FastJSONRenderer, ShoppingListCSVRenderer,
+                           ShoppingListJSONRenderer, ShoppingListTextRenderer)
 from api.serializers import (IngredientSerializer, RecipeAddSerializer,
-                             RecipeSerializer, RecipeSmallSerializer,
+                             RecipeIdsSerializer, RecipeReadSerializer,
+                             RecipeSmallSerializer, ShoppingListItemSerializer,
                              TagSerializer)
-from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
-                            ShoppingCart, Tag)
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                            ShoppingListItem, Tag)
+from recipes.user_recipes import add_recipes, remove_recipes
+
+SHOPPING_LIST_BUFFER_ROWS = 1000
+SHOPPING_LIST_CHUNK_SIZE = 500
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AllowAny,)
-    filter_backends = (IngredientFilter,)
-    filterset_class = IngredientFilter
-    search_fields = ('^name',)
+    # Ответ не зависит от пользователя, а без аутентификации по токену
+    # ответ 304 отдаётся после одного запроса метки версии.
+    authentication_classes = ()
+    version_model = Ingredient
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(self.search, request)
+
+    def search(self, request):
+        return Response(
+            ingredient_index.search(
+                request.query_params.get('name', ''), self.version
+            )
+        )
 
 
 class TagViewSet(
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet,
@@ -36,23 +65,62 @@ class TagViewSet(
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
+    authentication_classes = ()
+    version_model = Tag
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousCacheMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrAdminOnly,)
     pagination_class = CustomPagination
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, StableOrderingFilter)
     filterset_class = RecipeFilter
+    ordering_fields = ('pub_date', 'favorites_count', 'shopping_cart_count')
+    ordering_tie_breakers = ('-pub_date', '-id')
+
+    @property
+    def cursor_ordering(self):
+        """Сортировка для пагинации по курсору: из параметра ordering
+        или по умолчанию, дополненная как в StableOrderingFilter."""
+        ordering = StableOrderingFilter().get_ordering(
+            self.request, self.queryset, self
+        )
+        return complete_ordering(
+            ordering or Recipe._meta.ordering, self.ordering_tie_breakers
+        )
+
+    def get_queryset(self):
+        return Recipe.objects.with_related().with_user_flags(
+            self.request.user
+        )
 
     def get_serializer_class(self):
-        if self.request.method == 'POST' or self.request.method == 'PATCH':
-            return RecipeAddSerializer
-        return RecipeSerializer
+        if self.request.method in SAFE_METHODS:
+            return RecipeReadSerializer
+        return RecipeAddSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Карточки в ленте показывают уменьшенную копию изображения.
+        if self.action == 'list':
+            context['image_width'] = settings.RECIPE_CARD_IMAGE_WIDTH
+        return context
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def handle_exception(self, exc):
+        response = super().handle_exception(exc)
+
+        # Рендереры файла списка покупок не умеют отдавать ошибки:
+        # 401, 404 для неизвестного ?format= и другие ошибки выгрузки
+        # отдаются в JSON, как во всём API.
+        if self.action == 'download_shopping_cart':
+            self.request.accepted_renderer = FastJSONRenderer()
+            self.request.accepted_media_type = FastJSONRenderer.media_type
+
+        return response
+
     @action(
         detail=True, methods=('post', 'delete'),
         permission_classes=(IsAuthenticated,)
@@ -81,63 +149,115 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return None
 
+    @action(
+        detail=False, methods=('post', 'delete'), url_path='favorite',
+        url_name='favorite-bulk', permission_classes=(IsAuthenticated,)
+    )
+    def favorite_bulk(self, request):
+        return self.change_recipes(Favorite, request)
+
+    @action(
+        detail=False, methods=('post', 'delete'), url_path='shopping_cart',
+        url_name='shopping-cart-bulk', permission_classes=(IsAuthenticated,)
+    )
+    def shopping_cart_bulk(self, request):
+        return self.change_recipes(ShoppingCart, request)
+
     @action(
         detail=False,
         url_path='download_shopping_cart',
         methods=['GET'],
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            ShoppingListTextRenderer,
+            ShoppingListCSVRenderer,
+            ShoppingListJSONRenderer,
+        ),
     )
     def download_shopping_cart(self, request):
-        ingredients = IngredientsInRecipe.objects.filter(
-            recipe__shopping_cart__user=request.user
-        ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
+        """Список покупок в формате txt, csv или json (?format=).
+
+        Суммы читаются из ShoppingListItem. Небольшой список собирается
+        целиком и отдаётся с ETag и Content-Length, большой передаётся
+        потоком с серверным курсором.
+        """
+        renderer = request.accepted_renderer
+        rows = ShoppingListItem.objects.filter(
+            user=request.user
+        ).values_list(
+            'ingredient__name', 'ingredient__measurement_unit', 'amount'
         ).order_by(
             'ingredient__name'
-        ).annotate(
-            ingredient_total=Sum('amount')
-        )
-        products = []
+        ).iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE)
+        head = list(islice(rows, SHOPPING_LIST_BUFFER_ROWS))
+        chunks = renderer.render_rows(chain(head, rows))
+        content_type = f'{renderer.media_type}; charset={renderer.charset}'
 
-        for item in ingredients:
-            name = item['ingredient__name']
-            measurement_unit = item['ingredient__measurement_unit']
-            amount = item['ingredient_total']
-            products.append(f'{name} - {amount} {measurement_unit}')
+        if len(head) < SHOPPING_LIST_BUFFER_ROWS:
+            content = ''.join(chunks).encode(renderer.charset)
+            etag = quote_etag(hashlib.md5(content).hexdigest())
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = HttpResponse(content, content_type=content_type)
+                response['Content-Length'] = len(content)
+            response['ETag'] = etag
+        else:
+            response = StreamingHttpResponse(
+                (chunk.encode(renderer.charset) for chunk in chunks),
+                content_type=content_type,
+            )
 
-        content = '\n'.join(products)
-        content_type = 'text/plain, charset=utf8'
-        response = HttpResponse(content, content_type=content_type)
         response['Content-Disposition'] = (
-            'attachment; filename = "shopping_list.txt"'
+            f'attachment; filename="shopping_list.{renderer.format}"'
         )
 
         return response
 
+    @action(
+        detail=False,
+        url_path='shopping_cart_summary',
+        methods=['GET'],
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_cart_summary(self, request):
+        """Список покупок в JSON: суммарное количество каждого
+        ингредиента из рецептов в корзине."""
+        items = ShoppingListItem.objects.filter(
+            user=request.user
+        ).select_related('ingredient').order_by('ingredient__name')
+        serializer = ShoppingListItemSerializer(items, many=True)
+
+        return Response(serializer.data)
+
     def add_recipe(self, model, request, pk):
         recipe = get_object_or_404(Recipe, pk=pk)
-        user = self.request.user
 
-        if model.objects.filter(
-            recipe=recipe,
-            user=user
-        ).exists():
+        if not add_recipes(model, request.user, [recipe.pk]):
             raise ValidationError('Такой рецепт уже добавлен')
 
-        model.objects.create(
-            recipe=recipe,
-            user=user
-        )
         serializer = RecipeSmallSerializer(recipe)
 
         return Response(data=serializer.data, status=status.HTTP_201_CREATED)
 
     def delete_recipe(self, model, request, pk):
         recipe = get_object_or_404(Recipe, pk=pk)
-        user = self.request.user
-        obj = get_object_or_404(model, recipe=recipe, user=user)
-        obj.delete()
+
+        if not remove_recipes(model, request.user, [recipe.pk]):
+            raise ValidationError('Такого рецепта нет в списке')
 
         return Response(
             status=status.HTTP_204_NO_CONTENT
         )
+
+    def change_recipes(self, model, request):
+        """Добавляет или удаляет несколько рецептов одним запросом к базе
+        и возвращает id тех, что действительно добавлены или удалены."""
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        change = add_recipes if request.method == 'POST' else remove_recipes
+
+        return Response({
+            'recipes': change(
+                model, request.user, serializer.validated_data['recipes']
+            )
+        })
@@ -0,0 +1,163 @@
+"""Сравнение пропускной способности WSGI и ASGI при медленных клиентах.
+
+Запускает бэкенд под gunicorn с синхронными воркерами (foodgram.wsgi)
+и под gunicorn с воркерами uvicorn (foodgram.asgi) с одинаковым числом
+процессов и нагружает оба варианта одинаковым набором одновременных
+подключений. Медленный клиент отправляет заголовки запроса частями
+с паузами, как мобильный клиент на плохой сети.
+
+Запуск из каталога backend с теми же переменными окружения, что
+и у сервера (база должна быть заполнена, например, generatedata):
+
+    python benchmarks/asgi_vs_wsgi.py --connections 200 --slow 0.5
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+
+MODES = {
+    'wsgi': ['foodgram.wsgi:application'],
+    'asgi': [
+        'foodgram.asgi:application',
+        '--worker-class', 'uvicorn.workers.UvicornWorker',
+    ],
+}
+PATHS = ('/api/tags/', '/api/ingredients/?name=со', '/api/recipes/')
+
+
+def start_server(mode, port, workers):
+    server = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', *MODES[mode],
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(workers),
+            '--timeout', '120',
+            '--log-level', 'warning',
+        ],
+        env={**os.environ, 'DEBUG': 'false'},
+    )
+    deadline = time.monotonic() + 30
+
+    while time.monotonic() < deadline:
+        try:
+            status, _ = asyncio.run(request(port, PATHS[0], 0))
+        except OSError:
+            time.sleep(0.2)
+            continue
+        if status == 200:
+            return server
+        break
+
+    server.terminate()
+    raise RuntimeError(f'Сервер {mode} не запустился')
+
+
+async def request(port, path, slow):
+    """Отправляет GET-запрос, при slow > 0 - тремя частями с паузами,
+    и возвращает статус и размер ответа.
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    head = (
+        f'GET {quote(path, safe="/?=&")} HTTP/1.1\r\n'
+        f'Host: 127.0.0.1\r\n'
+        f'Accept: application/json\r\n'
+        f'Connection: close\r\n\r\n'
+    ).encode()
+
+    try:
+        if slow:
+            step = len(head) // 3 + 1
+            for start in range(0, len(head), step):
+                writer.write(head[start:start + step])
+                await writer.drain()
+                await asyncio.sleep(slow / 3)
+        else:
+            writer.write(head)
+            await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+
+    status = int(response.split(b' ', 2)[1]) if response else 0
+
+    return status, len(response)
+
+
+async def client(port, paths, slow, deadline, latencies, errors):
+    index = 0
+
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            status, _ = await request(port, paths[index % len(paths)], slow)
+        except OSError:
+            status = 0
+        if status == 200:
+            latencies.append(time.monotonic() - started)
+        else:
+            errors.append(status)
+        index += 1
+
+
+async def load(port, connections, duration, slow):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(
+        client(
+            port, PATHS[number % len(PATHS):] + PATHS[:number % len(PATHS)],
+            slow, deadline, latencies, errors,
+        )
+        for number in range(connections)
+    ))
+
+    return sorted(latencies), errors
+
+
+def report(mode, latencies, errors, duration):
+    if not latencies:
+        print(f'{mode}: нет успешных ответов, ошибок {len(errors)}')
+        return
+
+    def percentile(value):
+        return latencies[(len(latencies) - 1) * value // 100] * 1000
+
+    print(
+        f'{mode}: {len(latencies) / duration:.1f} запросов/с, '
+        f'p50 {percentile(50):.0f} мс, p95 {percentile(95):.0f} мс, '
+        f'максимум {latencies[-1] * 1000:.0f} мс, ошибок {len(errors)}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument(
+        '--slow', type=float, default=0.3,
+        help='Время отправки заголовков одним клиентом, с.',
+    )
+    parser.add_argument('--port', type=int, default=8765)
+    options = parser.parse_args()
+
+    for mode in options.modes:
+        server = start_server(mode, options.port, options.workers)
+        try:
+            latencies, errors = asyncio.run(load(
+                options.port, options.connections,
+                options.duration, options.slow,
+            ))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+        report(mode, latencies, errors, options.duration)
+
+
+if __name__ == '__main__':
+    main()
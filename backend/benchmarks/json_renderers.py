@@ -0,0 +1,144 @@
+"""Скорость JSON: стандартные JSONRenderer/JSONParser и FastJSON* на orjson.
+
+Полезные нагрузки собираются в памяти и по форме повторяют ответ
+списка рецептов (длинные описания) и запрос на создание рецепта
+(изображение в base64 и список ингредиентов), база не нужна.
+
+Запуск из каталога backend:
+
+    python benchmarks/json_renderers.py --recipes 100 --repeat 50
+"""
+import argparse
+import base64
+import io
+import os
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api.parsers import FastJSONParser  # noqa: E402
+from api.renderers import FastJSONRenderer, orjson  # noqa: E402
+
+TEXT = (
+    'Нарезать лук и морковь, обжарить на среднем огне '
+    'до золотистого цвета. '
+)
+
+
+def recipe(index, text_size):
+    return {
+        'tags': [
+            {'id': tag, 'name': f'Тег {tag}', 'color': '#E26C2D',
+             'slug': f'tag{tag}'}
+            for tag in range(3)
+        ],
+        'author': {
+            'email': f'user{index}@foodgram.ru', 'id': index,
+            'username': f'user{index}', 'first_name': 'Имя',
+            'last_name': 'Фамилия', 'is_subscribed': bool(index % 2),
+        },
+        'is_favorited': bool(index % 3),
+        'is_in_shopping_cart': False,
+        'name': f'Рецепт {index}',
+        'image': f'/backend_media/recipes/variants/photo{index}-640.jpg',
+        'image_variants': {
+            str(width): {
+                'jpeg': f'/backend_media/recipes/photo{index}-{width}.jpg',
+                'webp': f'/backend_media/recipes/photo{index}-{width}.webp',
+            }
+            for width in (320, 640, 1280)
+        },
+        'text': TEXT * (text_size // len(TEXT)),
+        'cooking_time': 30,
+        'id': index,
+        'ingredients': [
+            {'id': item, 'name': f'Продукт {item}',
+             'measurement_unit': 'г', 'amount': item * 10}
+            for item in range(8)
+        ],
+        'favorites_count': index * 7,
+        'shopping_cart_count': index,
+    }
+
+
+def payloads(recipes, text_size, image_size):
+    recipe_list = {
+        'count': 10000,
+        'next': 'http://foodgram.example.org/api/recipes/?page=2',
+        'previous': None,
+        'results': [recipe(index, text_size) for index in range(recipes)],
+    }
+    recipe_create = {
+        'ingredients': [
+            {'id': item, 'amount': item + 1} for item in range(20)
+        ],
+        'tags': [1, 2],
+        'image': 'data:image/jpeg;base64,'
+        + base64.b64encode(os.urandom(image_size)).decode(),
+        'name': 'Рецепт',
+        'text': TEXT * (text_size // len(TEXT)),
+        'cooking_time': 30,
+    }
+
+    return {'список рецептов': recipe_list, 'создание рецепта': recipe_create}
+
+
+def speed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+
+    return repeat / (time.perf_counter() - started), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, default=100)
+    parser.add_argument('--text-size', type=int, default=2000)
+    parser.add_argument('--image-size', type=int, default=300_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    options = parser.parse_args()
+
+    if orjson is None:
+        print('orjson не установлен: FastJSON* работают через json')
+
+    for name, data in payloads(
+        options.recipes, options.text_size, options.image_size
+    ).items():
+        content = JSONRenderer().render(data)
+        print(f'{name}: {len(content) / 1024:.0f} КБ')
+
+        for action, slow, fast in (
+            ('рендер', JSONRenderer().render, FastJSONRenderer().render),
+            ('разбор', JSONParser().parse, FastJSONParser().parse),
+        ):
+            argument = data if action == 'рендер' else content
+            results = []
+            for function in (slow, fast):
+                results.append(speed(
+                    lambda: function(
+                        argument if action == 'рендер'
+                        else io.BytesIO(argument)
+                    ),
+                    options.repeat,
+                ))
+            (slow_speed, expected), (fast_speed, actual) = results
+            print(
+                f'  {action}: json {slow_speed:.0f}/с, '
+                f'orjson {fast_speed:.0f}/с, '
+                f'ускорение {fast_speed / slow_speed:.1f}x'
+            )
+            if actual != expected:
+                sys.exit(f'{name}, {action}: результаты различаются')
+
+
+if __name__ == '__main__':
+    main()
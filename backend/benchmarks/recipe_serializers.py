@@ -0,0 +1,86 @@
+"""Скорость сериализации рецептов: RecipeSerializer и RecipeReadSerializer.
+
+Рецепты загружаются из базы один раз (как в списке рецептов:
+with_related() и with_user_flags()), затем каждый сериализатор
+несколько раз превращает их в JSON. Выводится число рецептов в секунду
+и проверяется, что ответы совпадают побайтно.
+
+Запуск из каталога backend с теми же переменными окружения, что
+и у сервера (база заполнена, например, generatedata):
+
+    python benchmarks/recipe_serializers.py --recipes 100 --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from api.serializers import RecipeReadSerializer, RecipeSerializer  # noqa
+from recipes.models import Recipe  # noqa: E402
+from users.models import CustomUser  # noqa: E402
+
+
+def measure(serializer_class, recipes, context, repeat):
+    renderer = JSONRenderer()
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        content = renderer.render(
+            serializer_class(recipes, many=True, context=context).data
+        )
+
+    return len(recipes) * repeat / (time.perf_counter() - started), content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    options = parser.parse_args()
+
+    user = CustomUser.objects.order_by('id').first()
+    if user is None:
+        sys.exit('База пуста: сначала выполните generatedata')
+
+    request = Request(APIRequestFactory().get('/api/recipes/'))
+    request.user = user
+    context = {
+        'request': request,
+        'image_width': settings.RECIPE_CARD_IMAGE_WIDTH,
+    }
+    recipes = list(
+        Recipe.objects.with_related().with_user_flags(user).order_by(
+            '-pub_date', '-id'
+        )[:options.recipes]
+    )
+
+    results = {}
+    for serializer_class in (RecipeSerializer, RecipeReadSerializer):
+        # Прогрев, чтобы не мерить построение полей при первом вызове.
+        measure(serializer_class, recipes, context, 1)
+        results[serializer_class.__name__] = measure(
+            serializer_class, recipes, context, options.repeat
+        )
+
+    for name, (speed, _) in results.items():
+        print(f'{name}: {speed:.0f} рецептов/с')
+
+    (slow, expected), (fast, actual) = results.values()
+    print(f'Ускорение: {fast / slow:.1f}x')
+    if actual != expected:
+        sys.exit('Ответы сериализаторов различаются')
+
+
+if __name__ == '__main__':
+    main()
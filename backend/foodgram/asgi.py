@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import ThreadSensitiveContext
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    # Без отдельного контекста Django 3.2 выполняет синхронный код
+    # всех запросов в одном общем потоке, и запросы к базе идут
+    # строго по очереди. В контексте у каждого запроса свой поток
+    # и своё соединение с базой.
+    async with ThreadSensitiveContext():
+        await django_application(scope, receive, send)
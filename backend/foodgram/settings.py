@@ -6,10 +6,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv('SECRET_KEY')
 
-DEBUG = os.getenv('DEBUG', '').lower()
-
-if DEBUG == 'true':
-    DEBUG = True
+DEBUG = os.getenv('DEBUG', '').lower() == 'true'
 
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '127.0.0.1').split(',')
 
@@ -24,23 +21,29 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'django_filters',
     'djoser',
-    'debug_toolbar',
     'recipes',
     'api',
     'users',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG:
+    # Middleware панели отладки только синхронная: под ASGI она
+    # переводила бы всю цепочку обработки запроса в поток.
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -57,10 +60,81 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend"
     ],
+    # JSON через orjson, без него - стандартный json.
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    }
+}
+
+# Время жизни индекса ингредиентов в памяти воркера, секунды.
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', 300))
+
+# Время жизни кэша count в пагинации, секунды (0 - не кэшировать).
+PAGINATION_COUNT_CACHE_TTL = int(os.getenv('PAGINATION_COUNT_CACHE_TTL', 30))
+
+# Начиная с такого числа строк count таблицы без фильтров берётся
+# из оценки планировщика PostgreSQL (0 - всегда считать точно).
+PAGINATION_ESTIMATE_THRESHOLD = int(
+    os.getenv('PAGINATION_ESTIMATE_THRESHOLD', 100000)
+)
+
+# max-age в Cache-Control ответов справочников, секунды.
+REFERENCE_CACHE_MAX_AGE = int(os.getenv('REFERENCE_CACHE_MAX_AGE', 60))
+
+# Время жизни кэша ответов списка и карточек рецептов для анонимных
+# пользователей, секунды (0 - не кэшировать).
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+
+# Ширины уменьшенных копий изображений рецептов (JPEG и WebP), пиксели.
+RECIPE_IMAGE_WIDTHS = tuple(
+    int(width) for width in os.getenv(
+        'RECIPE_IMAGE_WIDTHS', '320,640,1280'
+    ).split(',')
+)
+
+# Ширина копии для карточек в ленте и списках.
+RECIPE_CARD_IMAGE_WIDTH = int(os.getenv('RECIPE_CARD_IMAGE_WIDTH', 640))
+
+# Потоков для обработки изображений в каждом воркере
+# (0 - обрабатывать сразу после сохранения рецепта).
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', 2))
+
+# Где обрабатывать изображения: threads - в потоках веб-воркера,
+# jobs - в очереди фоновых задач (нужен запущенный runworker).
+RECIPE_IMAGE_QUEUE = os.getenv('RECIPE_IMAGE_QUEUE', 'threads')
+
+# Через сколько секунд выполняющаяся задача считается зависшей
+# и снова становится доступна воркерам.
+JOBS_TIMEOUT = int(os.getenv('JOBS_TIMEOUT', 600))
+
+# Задержка перед первым повтором задачи и максимальная задержка, секунды.
+JOBS_BACKOFF = int(os.getenv('JOBS_BACKOFF', 10))
+JOBS_MAX_BACKOFF = int(os.getenv('JOBS_MAX_BACKOFF', 3600))
+
+# Ответы меньше этого размера не сжимаются, байты.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 500))
+
+# Уровень сжатия gzip (1-9) и качество brotli (0-11).
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))
+
 LOGIN_REDIRECT_URL = '/'
 
 DJOSER = {
@@ -70,8 +144,8 @@ DJOSER = {
     'SEND_ACTIVATION_EMAIL': False,
     'HIDE_USERS': False,
     'SERIALIZERS': {
-        'user': 'users.serializers.CustomUserSerializer',
-        'current_user': 'users.serializers.CustomUserSerializer'
+        'user': 'users.serializers.UserWithCountersSerializer',
+        'current_user': 'users.serializers.UserWithCountersSerializer'
     },
     'PERMISSIONS': {
         'user': ['rest_framework.permissions.AllowAny'],
@@ -112,16 +186,24 @@ WSGI_APPLICATION = 'foodgram.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('POSTGRES_DB'),
-        'USER': os.getenv('POSTGRES_USER'),
-        'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
-        'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+if os.getenv('DB_ENGINE', 'postgresql') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB'),
+            'USER': os.getenv('POSTGRES_USER'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
+            'HOST': os.getenv('DB_HOST'),
+            'PORT': os.getenv('DB_PORT')
+        }
     }
-}
 
 
 # Password validation
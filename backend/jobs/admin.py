@@ -0,0 +1,23 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'name', 'status', 'attempts', 'run_after', 'duration', 'worker'
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = (
+        'attempts', 'created_at', 'started_at', 'finished_at', 'duration',
+        'worker', 'last_error'
+    )
+    actions = ('retry',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request, queryset):
+        queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_after=timezone.now()
+        )
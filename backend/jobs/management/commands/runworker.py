@@ -0,0 +1,49 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в базе данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10,
+            help='Сколько задач выполнить подряд между проверками '
+                 'сигнала остановки.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить доступные задачи и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(batch_size=options['batch_size'])
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stdout.write(self.style.NOTICE(f'Воркер {worker.name} запущен'))
+
+        while not self.stopping:
+            if worker.run_once():
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+
+        for line in worker.summary():
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(
+            f'Воркер {worker.name} остановлен'
+        ))
+
+    def stop(self, signum, frame):
+        # Текущая пачка задач дорабатывает до конца.
+        self.stopping = True
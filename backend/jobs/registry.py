@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from jobs.models import Job
+
+TASKS = {}
+
+
+def task(name, max_attempts=5):
+    """Регистрирует функцию как фоновую задачу с именем name.
+
+    Аргументы задачи передаются через JSON, поэтому должны быть
+    сериализуемы (id вместо объектов моделей).
+    """
+    def decorator(func):
+        func.task_name = name
+        func.max_attempts = max_attempts
+        TASKS[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(task_name, /, delay=0, **payload):
+    """Ставит задачу в очередь с аргументами payload не раньше чем
+    через delay секунд. Вызов внутри транзакции создаёт задачу вместе
+    с остальными изменениями: при откате её не будет."""
+    if task_name not in TASKS:
+        raise KeyError(f'Неизвестная задача: {task_name}')
+
+    return Job.objects.create(
+        name=task_name,
+        payload=payload,
+        max_attempts=TASKS[task_name].max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
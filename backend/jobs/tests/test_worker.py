@@ -0,0 +1,124 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import TASKS, enqueue, task
+from jobs.worker import Worker
+
+CALLS = []
+
+
+@task('tests.record')
+def record(value):
+    CALLS.append(value)
+
+
+@task('tests.fail', max_attempts=2)
+def fail():
+    raise ValueError('ошибка')
+
+
+@override_settings(JOBS_BACKOFF=10, JOBS_MAX_BACKOFF=60, JOBS_TIMEOUT=60)
+class WorkerTestCase(TestCase):
+    """Захват, выполнение и повтор фоновых задач."""
+
+    def setUp(self):
+        CALLS.clear()
+        self.worker = Worker(batch_size=10, name='test')
+
+    def test_run(self):
+        jobs = [enqueue('tests.record', value=index) for index in range(3)]
+
+        self.assertEqual(self.worker.run_once(), 3)
+        self.assertEqual(CALLS, [0, 1, 2])
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.DONE)
+            self.assertEqual(job.attempts, 1)
+            self.assertIsNotNone(job.duration)
+        self.assertEqual(self.worker.run_once(), 0)
+        self.assertIn('tests.record: 3', self.worker.summary()[0])
+
+    def test_delay(self):
+        enqueue('tests.record', delay=60, value=1)
+
+        self.assertEqual(self.worker.run_once(), 0)
+
+    def test_retry_with_backoff(self):
+        job = enqueue('tests.fail')
+
+        self.worker.run_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('ValueError', job.last_error)
+        self.assertGreater(job.run_after, timezone.now())
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.worker.run_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_backoff_grows(self):
+        delays = [Worker.backoff(attempt) for attempt in range(1, 6)]
+
+        self.assertLessEqual(delays[0], timedelta(seconds=10))
+        self.assertGreaterEqual(delays[2], timedelta(seconds=20))
+        self.assertLessEqual(delays[-1], timedelta(seconds=60))
+
+    def test_claim_once(self):
+        enqueue('tests.record', value=1)
+
+        self.assertIsNotNone(self.worker.claim())
+        self.assertIsNone(Worker(name='other').claim())
+
+    def test_stale_job_reclaimed(self):
+        job = enqueue('tests.record', value=1)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            worker='crashed',
+            started_at=timezone.now() - timedelta(seconds=120),
+        )
+
+        self.assertEqual(self.worker.run_once(), 1)
+        self.assertEqual(CALLS, [1])
+
+    def test_started_at_per_job(self):
+        """Задачи пачки захватываются по одной перед запуском."""
+        jobs = [enqueue('tests.record', value=index) for index in range(2)]
+        statuses = []
+
+        def record_status(value):
+            statuses.append(Job.objects.get(pk=jobs[1].pk).status)
+
+        with patch.dict(TASKS, {'tests.record': record_status}):
+            self.assertEqual(self.worker.run_once(), 2)
+
+        # Пока выполнялась первая задача, вторая оставалась в очереди
+        # и не могла считаться зависшей по раннему started_at.
+        self.assertEqual(statuses, [Job.QUEUED, Job.RUNNING])
+        for job in jobs:
+            job.refresh_from_db()
+        self.assertGreaterEqual(jobs[1].started_at, jobs[0].finished_at)
+
+    def test_stale_job_out_of_attempts(self):
+        job = enqueue('tests.fail')
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            worker='crashed',
+            attempts=2,
+            started_at=timezone.now() - timedelta(seconds=120),
+        )
+
+        self.assertEqual(self.worker.run_once(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.last_error, Worker.stale_error)
+
+    def test_unknown_task(self):
+        with self.assertRaises(KeyError):
+            enqueue('tests.unknown')
@@ -0,0 +1,189 @@
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import TASKS
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Выполняет задачи из таблицы Job.
+
+    На PostgreSQL задачи захватываются SELECT ... FOR UPDATE SKIP LOCKED,
+    поэтому несколько воркеров не ждут друг друга и не берут одну задачу
+    дважды. На базах без SKIP LOCKED (SQLite) задача захватывается
+    условным UPDATE по статусу. Задача захватывается непосредственно
+    перед выполнением, поэтому started_at - время её запуска. Задачи,
+    которые выполняются дольше JOBS_TIMEOUT секунд (воркер упал), снова
+    становятся доступны, а исчерпавшие попытки завершаются ошибкой.
+    Неудачная задача повторяется с экспоненциальной задержкой.
+    """
+
+    stale_error = 'Превышено время выполнения JOBS_TIMEOUT'
+
+    def __init__(self, batch_size=10, name=None):
+        self.batch_size = batch_size
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.stats = {}
+
+    @staticmethod
+    def stale_before():
+        return timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT)
+
+    def available(self):
+        return Job.objects.filter(
+            Q(status=Job.QUEUED, run_after__lte=timezone.now())
+            | Q(
+                status=Job.RUNNING,
+                started_at__lt=self.stale_before(),
+                attempts__lt=F('max_attempts'),
+            )
+        ).order_by('run_after', 'id')
+
+    def fail_stale(self):
+        """Завершает ошибкой зависшие задачи без оставшихся попыток."""
+        return Job.objects.filter(
+            status=Job.RUNNING,
+            started_at__lt=self.stale_before(),
+            attempts__gte=F('max_attempts'),
+        ).update(
+            status=Job.FAILED,
+            finished_at=timezone.now(),
+            last_error=self.stale_error,
+        )
+
+    def claim(self):
+        """Захватывает одну задачу и возвращает её или None."""
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                job_id = self.available().select_for_update(
+                    skip_locked=True
+                ).values_list('id', flat=True).first()
+                if job_id is None:
+                    return None
+                self.mark_running(Job.objects.filter(id=job_id))
+        else:
+            candidates = self.available().values_list(
+                'id', flat=True
+            )[:self.batch_size]
+            for job_id in candidates:
+                # Условие повторяется в UPDATE: если задачу уже захватил
+                # другой воркер, ни одна строка не обновится.
+                if self.mark_running(self.available().filter(id=job_id)):
+                    break
+            else:
+                return None
+
+        return Job.objects.get(id=job_id)
+
+    def mark_running(self, jobs):
+        return jobs.update(
+            status=Job.RUNNING,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+            worker=self.name,
+        )
+
+    def run_once(self):
+        """Выполняет до batch_size задач, возвращает их число."""
+        self.fail_stale()
+        count = 0
+
+        while count < self.batch_size:
+            job = self.claim()
+            if job is None:
+                break
+            self.run(job)
+            count += 1
+
+        return count
+
+    def run(self, job):
+        started = time.monotonic()
+        func = TASKS.get(job.name)
+
+        try:
+            if func is None:
+                raise KeyError(f'Неизвестная задача: {job.name}')
+            func(**job.payload)
+        except Exception:
+            self.fail(job, traceback.format_exc(), time.monotonic() - started)
+        else:
+            self.finish(job, time.monotonic() - started)
+
+    def finish(self, job, duration):
+        Job.objects.filter(id=job.id, worker=self.name).update(
+            status=Job.DONE,
+            finished_at=timezone.now(),
+            duration=duration,
+            last_error='',
+        )
+        self.record(job, duration, 'done')
+        logger.info('Задача %s выполнена за %.3f с', job, duration)
+
+    def fail(self, job, error, duration):
+        if job.attempts < job.max_attempts:
+            status = Job.QUEUED
+            run_after = timezone.now() + self.backoff(job.attempts)
+        else:
+            status, run_after = Job.FAILED, job.run_after
+
+        Job.objects.filter(id=job.id, worker=self.name).update(
+            status=status,
+            run_after=run_after,
+            finished_at=timezone.now(),
+            duration=duration,
+            last_error=error,
+        )
+        self.record(job, duration, status)
+        logger.warning(
+            'Задача %s завершилась ошибкой (попытка %s из %s):\n%s',
+            job, job.attempts, job.max_attempts, error
+        )
+
+    @staticmethod
+    def backoff(attempts):
+        """Задержка перед повтором: удваивается с каждой попыткой,
+        не больше JOBS_MAX_BACKOFF секунд, со случайным разбросом."""
+        delay = min(
+            settings.JOBS_BACKOFF * 2 ** (attempts - 1),
+            settings.JOBS_MAX_BACKOFF
+        )
+        return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+    def record(self, job, duration, outcome):
+        durations, outcomes = self.stats.setdefault(
+            job.name, ([], Counter())
+        )
+        durations.append(duration)
+        outcomes[outcome] += 1
+
+    def summary(self):
+        """Строки со статистикой времени выполнения по задачам."""
+        lines = []
+
+        for name, (durations, outcomes) in sorted(self.stats.items()):
+            durations = sorted(durations)
+            p95 = durations[(len(durations) - 1) * 95 // 100]
+            outcomes = ', '.join(
+                f'{outcome}: {count}' for outcome, count in outcomes.items()
+            )
+            lines.append(
+                f'{name}: {len(durations)} запусков ({outcomes}), '
+                f'среднее {sum(durations) / len(durations):.3f} с, '
+                f'p95 {p95:.3f} с, максимум {durations[-1]:.3f} с'
+            )
+
+        return lines
@@ -2,7 +2,9 @@ from django.contrib import admin
 from django.contrib.admin import display
 
 from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
-                            ShoppingCart, Tag)
+                            ShoppingCart, ShoppingListItem, Tag)
+from recipes.shopping_list import (recipe_ingredient_ids,
+                                   refresh_recipe_in_shopping_lists)
 
 
 class IngredientsInline(admin.TabularInline):
@@ -13,13 +15,21 @@ class IngredientsInline(admin.TabularInline):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'author', 'added_to_favorites')
-    readonly_fields = ('added_to_favorites',)
+    readonly_fields = ('added_to_favorites', 'shopping_cart_count')
     list_filter = ('author', 'name', 'tags',)
     inlines = (IngredientsInline,)
 
-    @display
+    def save_related(self, request, form, formsets, change):
+        ingredient_ids = recipe_ingredient_ids(form.instance.id)
+        super().save_related(request, form, formsets, change)
+        refresh_recipe_in_shopping_lists(
+            form.instance.id,
+            ingredient_ids | recipe_ingredient_ids(form.instance.id)
+        )
+
+    @display(description='В избранном', ordering='favorites_count')
     def added_to_favorites(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
 
 @admin.register(Ingredient)
@@ -46,3 +56,30 @@ class FavoriteAdmin(admin.ModelAdmin):
 @admin.register(IngredientsInRecipe)
 class IngredientsInRecipeAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'ingredient', 'amount',)
+
+    def save_model(self, request, obj, form, change):
+        ingredient_ids = {obj.ingredient_id}
+        if change:
+            ingredient_ids |= set(
+                IngredientsInRecipe.objects.filter(
+                    pk=obj.pk
+                ).values_list('ingredient_id', flat=True)
+            )
+        super().save_model(request, obj, form, change)
+        refresh_recipe_in_shopping_lists(obj.recipe_id, ingredient_ids)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_recipe_in_shopping_lists(obj.recipe_id, {obj.ingredient_id})
+
+    def delete_queryset(self, request, queryset):
+        rows = list(queryset.values_list('recipe_id', 'ingredient_id'))
+        super().delete_queryset(request, queryset)
+        for recipe_id, ingredient_id in rows:
+            refresh_recipe_in_shopping_lists(recipe_id, {ingredient_id})
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'ingredient', 'amount',)
+    readonly_fields = ('user', 'ingredient', 'amount',)
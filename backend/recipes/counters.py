@@ -0,0 +1,38 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import CustomUser, Subscribe
+
+# Счётчик: (модель, поле счётчика, модель-источник, поле связи в источнике).
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'shopping_cart_count', ShoppingCart, 'recipe'),
+    (CustomUser, 'recipes_count', Recipe, 'author'),
+    (CustomUser, 'followers_count', Subscribe, 'author'),
+    (CustomUser, 'following_count', Subscribe, 'user'),
+)
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарно изменяет счётчик на delta выражением F() в одном UPDATE."""
+    change_counters(model, [pk], field, delta)
+
+
+def change_counters(model, pks, field, delta):
+    model.objects.filter(pk__in=pks).update(**{field: F(field) + delta})
+
+
+def rebuild_counters():
+    """Пересчитывает все счётчики с нуля, по одному UPDATE на счётчик."""
+    for model, field, source, relation in COUNTERS:
+        count = source.objects.filter(
+            **{relation: OuterRef('pk')}
+        ).order_by().values(relation).annotate(
+            total=Count('pk')
+        ).values('total')
+        model.objects.update(**{
+            field: Coalesce(
+                Subquery(count, output_field=IntegerField()), 0
+            )
+        })
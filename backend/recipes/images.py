@@ -0,0 +1,165 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+from jobs.registry import enqueue
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'recipes/variants'
+FORMATS = (
+    ('jpeg', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    ('webp', 'webp', {'quality': 80, 'method': 4}),
+)
+
+# Отправляется, когда уменьшенные копии изображения рецепта сохранены.
+image_variants_ready = Signal()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-images',
+            )
+
+    return _executor
+
+
+def schedule_image_variants(recipe):
+    """Откладывает сборку уменьшенных копий, чтобы запрос на загрузку
+    рецепта не ждал обработки изображения.
+
+    При RECIPE_IMAGE_QUEUE = 'jobs' создаётся фоновая задача для runworker,
+    иначе копии собираются в пуле потоков воркера после коммита
+    (при RECIPE_IMAGE_WORKERS = 0 - сразу после коммита).
+    """
+    recipe_id, name = recipe.pk, recipe.image.name
+
+    if settings.RECIPE_IMAGE_QUEUE == 'jobs':
+        enqueue('recipes.image_variants', recipe_id=recipe_id, name=name)
+        return
+
+    def submit():
+        if settings.RECIPE_IMAGE_WORKERS:
+            get_executor().submit(run_in_thread, recipe_id, name)
+        else:
+            try_make_image_variants(recipe_id, name)
+
+    transaction.on_commit(submit)
+
+
+def run_in_thread(recipe_id, name):
+    close_old_connections()
+    try:
+        try_make_image_variants(recipe_id, name)
+    finally:
+        close_old_connections()
+
+
+def try_make_image_variants(recipe_id, name):
+    try:
+        make_image_variants(recipe_id, name)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+
+
+def make_image_variants(recipe_id, name):
+    """Сохраняет копии изображения name шириной RECIPE_IMAGE_WIDTHS
+    (только меньше оригинала) в JPEG и WebP и записывает их пути
+    в Recipe.image_variants.
+
+    Поле обновляется, только если у рецепта всё ещё то же изображение.
+    """
+    widths = sorted(settings.RECIPE_IMAGE_WIDTHS)
+
+    with default_storage.open(name, 'rb') as file:
+        image = Image.open(file)
+        # JPEG декодируется сразу в уменьшенном размере.
+        image.draft('RGB', (
+            widths[-1], max(1, image.height * widths[-1] // image.width)
+        ))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = {'source': name}
+
+    for width in widths:
+        if width >= image.width:
+            # Копия не меньше оригинала не нужна.
+            break
+        resized = image.copy()
+        resized.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+        variants[str(width)] = {
+            image_format: save_variant(
+                resized, f'{VARIANTS_DIR}/{stem}-{width}.{extension}',
+                image_format, options
+            )
+            for image_format, extension, options in FORMATS
+        }
+
+    updated = Recipe.objects.filter(
+        pk=recipe_id, image=name
+    ).update(image_variants=variants)
+
+    if updated:
+        image_variants_ready.send(sender=Recipe, recipe_id=recipe_id)
+
+    return variants
+
+
+def save_variant(image, name, image_format, options):
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def variant_url(recipe, width, image_format='jpeg'):
+    """URL копии изображения или оригинала, если копий ещё нет."""
+    variant = (recipe.image_variants or {}).get(str(width), {})
+    name = variant.get(image_format)
+
+    if name and recipe.image_variants.get('source') == recipe.image.name:
+        return default_storage.url(name)
+
+    return recipe.image.url
+
+
+def variant_urls(recipe):
+    variants = recipe.image_variants or {}
+
+    if variants.get('source') != recipe.image.name:
+        return {}
+
+    return {
+        width: {
+            image_format: default_storage.url(name)
+            for image_format, name in formats.items()
+        }
+        for width, formats in variants.items()
+        if width != 'source'
+    }
@@ -0,0 +1,266 @@
+import itertools
+import random
+import time
+from bisect import bisect
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from tqdm import tqdm
+
+from recipes.counters import rebuild_counters
+from recipes.models import (Favorite, Ingredient, IngredientsInRecipe, Recipe,
+                            ShoppingCart, Tag)
+from recipes.shopping_list import refresh_shopping_list
+from users.models import CustomUser, Subscribe
+
+WORDS = (
+    'соль', 'перец', 'масло', 'лук', 'чеснок', 'мука', 'яйцо', 'сахар',
+    'нарезать', 'обжарить', 'смешать', 'запечь', 'добавить', 'посолить',
+    'довести', 'до', 'кипения', 'на', 'среднем', 'огне', 'минут', 'и',
+    'подавать', 'горячим', 'с', 'зеленью', 'тесто', 'соус', 'сковороде',
+)
+TAG_COLORS = (
+    '#E26C2D', '#49B64E', '#8775D2', '#F9A62B', '#2D9CDB', '#EB5757',
+)
+IMAGE = 'recipes/IMG_9553.JPG'
+
+
+class Skewed:
+    """Выбор элементов с распределением Ципфа: первые встречаются чаще."""
+
+    def __init__(self, items, exponent):
+        self.items = list(items)
+        weights = [
+            1 / rank ** exponent for rank in range(1, len(self.items) + 1)
+        ]
+        self.cum_weights = list(itertools.accumulate(weights))
+        self.total = self.cum_weights[-1] if self.cum_weights else 0
+
+    def choice(self, rng):
+        return self.items[bisect(self.cum_weights, rng.random() * self.total)]
+
+
+class Command(BaseCommand):
+
+    help = 'Генерация синтетических данных для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=6)
+        parser.add_argument(
+            '--ingredients', type=int, default=2000,
+            help='Ингредиенты создаются, только если справочник пуст.'
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8,
+            help='Среднее количество ингредиентов в рецепте.'
+        )
+        parser.add_argument('--favorites', type=int, default=50000)
+        parser.add_argument('--carts', type=int, default=20000)
+        parser.add_argument('--subscriptions', type=int, default=10000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа для популярности.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--password', default='foodgram-password',
+            help='Пароль всех сгенерированных пользователей.'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.skew = options['skew']
+        self.prefix = f'gen{int(time.time())}'
+        started = time.monotonic()
+
+        if options['users'] < 2:
+            raise CommandError('Нужно как минимум два пользователя.')
+
+        users = self.create_users(options['users'], options['password'])
+        tags = self.create_tags(options['tags'])
+        ingredients = self.get_ingredients(options['ingredients'])
+        recipes = self.create_recipes(options['recipes'], users)
+        self.create_recipe_relations(
+            recipes, tags, ingredients, options['ingredients_per_recipe']
+        )
+        self.create_pairs(
+            Favorite, 'recipe', users, recipes, options['favorites']
+        )
+        self.create_pairs(
+            ShoppingCart, 'recipe', users, recipes, options['carts']
+        )
+        self.create_pairs(
+            Subscribe, 'author', users, users, options['subscriptions']
+        )
+        # bulk_create не отправляет сигналы, поэтому счётчики и списки
+        # покупок пересчитываются явно.
+        self.refresh_shopping_lists(users)
+        with transaction.atomic():
+            rebuild_counters()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные сгенерированы за {time.monotonic() - started:.1f} с'
+        ))
+
+    def bulk_insert(self, model, objects, total, **kwargs):
+        """Вставляет объекты пачками по batch_size, не держа их в памяти."""
+        objects = iter(objects)
+        pbar = tqdm(total=total, desc=model._meta.verbose_name_plural)
+
+        while True:
+            batch = list(itertools.islice(objects, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch, **kwargs)
+            pbar.update(len(batch))
+
+        pbar.close()
+
+    def refresh_shopping_lists(self, users):
+        for start in tqdm(
+            range(0, len(users), self.batch_size), desc='Списки покупок'
+        ):
+            refresh_shopping_list(users[start:start + self.batch_size])
+
+    def created_ids(self, model, last_id):
+        return list(
+            model.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    def last_id(self, model):
+        last = model.objects.order_by('-id').values_list('id', flat=True)
+        return last.first() or 0
+
+    def create_users(self, count, password):
+        last_id = self.last_id(CustomUser)
+        password = make_password(password)
+        users = (
+            CustomUser(
+                email=f'{self.prefix}_{index}@foodgram.ru',
+                username=f'{self.prefix}_{index}',
+                first_name=f'Имя{index}',
+                last_name=f'Фамилия{index}',
+                password=password,
+            )
+            for index in range(count)
+        )
+        self.bulk_insert(CustomUser, users, count)
+
+        return self.created_ids(CustomUser, last_id)
+
+    def create_tags(self, count):
+        existing = Tag.objects.count()
+        tags = (
+            Tag(
+                name=f'Тег{index}',
+                color=f'{TAG_COLORS[index % len(TAG_COLORS)]}{index:02x}'[:10],
+                slug=f'tag{index}',
+            )
+            for index in range(existing, count)
+        )
+        self.bulk_insert(
+            Tag, tags, max(count - existing, 0), ignore_conflicts=True
+        )
+
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def get_ingredients(self, count):
+        if not Ingredient.objects.exists():
+            ingredients = (
+                Ingredient(name=f'Ингредиент {index}', measurement_unit='г')
+                for index in range(count)
+            )
+            self.bulk_insert(Ingredient, ingredients, count)
+
+        return list(Ingredient.objects.values_list('id', flat=True))
+
+    def create_recipes(self, count, users):
+        last_id = self.last_id(Recipe)
+        authors = Skewed(users, self.skew)
+        recipes = (
+            Recipe(
+                name=f'Рецепт {index}',
+                author_id=authors.choice(self.rng),
+                image=IMAGE,
+                text=' '.join(
+                    self.rng.choices(WORDS, k=self.rng.randint(20, 200))
+                ),
+                cooking_time=self.rng.randint(5, 180),
+            )
+            for index in range(count)
+        )
+        self.bulk_insert(Recipe, recipes, count)
+
+        return self.created_ids(Recipe, last_id)
+
+    def create_recipe_relations(self, recipes, tags, ingredients, average):
+        popular = Skewed(ingredients, self.skew)
+        tag_count = min(len(tags), 3)
+
+        def recipe_tags():
+            for recipe_id in recipes:
+                for tag_id in self.rng.sample(
+                    tags, self.rng.randint(1, tag_count)
+                ):
+                    yield Recipe.tags.through(
+                        recipe_id=recipe_id, tag_id=tag_id
+                    )
+
+        def recipe_ingredients():
+            for recipe_id in recipes:
+                count = max(1, int(self.rng.gauss(average, average / 3)))
+                chosen = set()
+                for _ in range(min(count, len(ingredients))):
+                    chosen.add(popular.choice(self.rng))
+                for ingredient_id in chosen:
+                    yield IngredientsInRecipe(
+                        recipe_id=recipe_id,
+                        ingredient_id=ingredient_id,
+                        amount=self.rng.randint(1, 1000),
+                    )
+
+        if tags:
+            self.bulk_insert(
+                Recipe.tags.through, recipe_tags(), len(recipes) * tag_count
+            )
+        if ingredients:
+            self.bulk_insert(
+                IngredientsInRecipe, recipe_ingredients(),
+                len(recipes) * average
+            )
+
+    def create_pairs(self, model, target, users, targets, count):
+        """Создаёт уникальные пары пользователь-объект.
+
+        Активность пользователей и популярность объектов распределены
+        по Ципфу, поэтому небольшая часть рецептов и авторов собирает
+        большинство связей.
+        """
+        if not users or not targets:
+            return
+
+        count = min(count, len(users) * len(targets) // 2)
+        active = Skewed(self.rng.sample(users, len(users)), self.skew / 2)
+        popular = Skewed(targets, self.skew)
+        seen = set()
+        attempts = count * 20
+
+        def pairs():
+            for _ in range(attempts):
+                if len(seen) >= count:
+                    break
+                pair = (active.choice(self.rng), popular.choice(self.rng))
+                if pair in seen or pair[0] == pair[1] and model is Subscribe:
+                    continue
+                seen.add(pair)
+                yield model(user_id=pair[0], **{f'{target}_id': pair[1]})
+
+        self.bulk_insert(model, pairs(), count, ignore_conflicts=True)
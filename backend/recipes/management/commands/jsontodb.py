@@ -1,34 +1,258 @@
+import csv
+import itertools
 import json
+import os
+import time
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from foodgram.settings import BASE_DIR
 from tqdm import tqdm
 
+from api.conditional import bump_version
+from api.constants import ITEM_NAME_MAX_LEN
 from recipes.models import Ingredient
 
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_item(item, number):
+    """Название и единица измерения из элемента JSON-массива."""
+    try:
+        name, measurement_unit = item['name'], item['measurement_unit']
+    except (KeyError, TypeError):
+        name = measurement_unit = None
+
+    if not isinstance(name, str) or not isinstance(measurement_unit, str):
+        raise CommandError(
+            f'Элемент {number}: ожидался объект со строковыми полями '
+            'name и measurement_unit'
+        )
+
+    return name, measurement_unit
+
+
+def iter_json_array(file):
+    """Читает JSON-массив объектов по одному элементу, не загружая файл.
+
+    Файл читается кусками по CHUNK_SIZE символов, синтаксис массива
+    (скобки и запятые между элементами) проверяется, ошибки
+    превращаются в CommandError.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    # Что ожидается дальше: '[', первый элемент или ']', элемент,
+    # ',' или ']', конец файла.
+    expected = 'start'
+    number = 0
+
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n':
+                position += 1
+            if position == len(buffer):
+                break
+            char = buffer[position]
+
+            if expected == 'start':
+                if char != '[':
+                    raise CommandError('Ожидался JSON-массив ингредиентов')
+                position += 1
+                expected = 'first'
+            elif expected == 'first' and char == ']':
+                position += 1
+                expected = 'end'
+            elif expected in ('first', 'item'):
+                try:
+                    item, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as exc:
+                    if eof:
+                        raise CommandError(
+                            f'Элемент {number + 1}: неверный JSON ({exc})'
+                        )
+                    # Элемент не поместился в буфер, читаем дальше.
+                    break
+                number += 1
+                yield parse_item(item, number)
+                expected = 'separator'
+            elif expected == 'separator' and char in ',]':
+                position += 1
+                expected = 'item' if char == ',' else 'end'
+            elif expected == 'separator':
+                raise CommandError(
+                    f'После элемента {number} ожидалась запятая или ]'
+                )
+            else:
+                raise CommandError('Лишние данные после JSON-массива')
+
+        if eof:
+            break
+
+    if expected != 'end':
+        raise CommandError('Файл ингредиентов обрывается на середине')
+
+
+def iter_csv(file):
+    reader = csv.reader(file)
+
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < 2:
+            raise CommandError(
+                f'Строка {reader.line_num}: ожидались название '
+                'и единица измерения'
+            )
+        yield row[0], row[1]
+
+
+READERS = {
+    'json': iter_json_array,
+    'csv': iter_csv,
+}
+
 
 class Command(BaseCommand):
 
-    help = 'Импорт csv файлов в таблицы базы'
+    help = 'Импорт ингредиентов из json или csv файла в базу данных'
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write(self.style.NOTICE(
-            'Начинаем процесс переноса данных из json в Базу данных '))
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(BASE_DIR, 'data', 'ingredients.json'),
+            help='Путь к файлу ингредиентов (.json или .csv).'
+        )
+        parser.add_argument(
+            '--format', choices=READERS, default=None,
+            help='Формат файла, по умолчанию определяется по расширению.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Проверить файл и посчитать изменения без записи в базу.'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help=(
+                'Обновлять единицу измерения у существующего ингредиента '
+                'с тем же названием вместо создания нового.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1][1:]
 
-        with open(
-            f'{BASE_DIR}/data/ingredients.json', encoding='utf-8', mode='r'
-        ) as file:
-            json_read = json.load(file)
-            pbar = tqdm(json_read)
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
 
-            for ingredient in json_read:
-                pbar.set_description('Processing %s ' % ingredient['name'])
-                pbar.update()
+        self.stdout.write(self.style.NOTICE(
+            f'Начинаем процесс переноса данных из {path} в Базу данных'))
 
-                Ingredient.objects.get_or_create(
-                    name=ingredient['name'],
-                    measurement_unit=ingredient['measurement_unit']
+        self.upsert = options['upsert']
+        self.seen_names = set()
+        self.stats = {'rows': 0, 'skipped': 0, 'updated': 0}
+        started = time.monotonic()
+        count_before = Ingredient.objects.count()
+
+        with open(path, encoding='utf-8', mode='r', newline='') as file:
+            rows = READERS[file_format](file)
+            with transaction.atomic():
+                self.import_rows(
+                    rows, options['batch_size'], options['verbosity']
                 )
+                created = Ingredient.objects.count() - count_before
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+                else:
+                    # bulk_create не отправляет сигналы. Метка меняется
+                    # в той же транзакции, что и ингредиенты.
+                    bump_version(Ingredient)
+
+        elapsed = time.monotonic() - started
+        rate = self.stats['rows'] / elapsed if elapsed else 0
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                '\n Пробный запуск, изменения не сохранены'))
+        self.stdout.write(self.style.SUCCESS(
+            '\n Данные успешно перенесены: '
+            f'прочитано {self.stats["rows"]}, добавлено {created}, '
+            f'обновлено {self.stats["updated"]}, '
+            f'пропущено {self.stats["skipped"]} '
+            f'за {elapsed:.2f} с ({rate:.0f} строк/с)'
+        ))
+
+    def import_rows(self, rows, batch_size, verbosity):
+        pbar = tqdm(unit=' строк', disable=verbosity < 1)
+
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+            self.stats['rows'] += len(batch)
+            pbar.update(len(batch))
+
+        pbar.close()
+
+    def import_batch(self, batch):
+        ingredients = []
+
+        for name, measurement_unit in batch:
+            name, measurement_unit = name.strip(), measurement_unit.strip()
+            if (
+                not name or not measurement_unit
+                or len(name) > ITEM_NAME_MAX_LEN
+                or len(measurement_unit) > ITEM_NAME_MAX_LEN
+            ):
+                self.stats['skipped'] += 1
+                continue
+            ingredients.append(
+                Ingredient(name=name, measurement_unit=measurement_unit)
+            )
+
+        if self.upsert:
+            ingredients = self.update_existing(ingredients)
+
+        Ingredient.objects.bulk_create(ingredients, ignore_conflicts=True)
+
+    def update_existing(self, ingredients):
+        """Обновляет единицы измерения, возвращает ингредиенты для вставки.
+
+        Ингредиент обновляется, если в базе ровно одна запись с таким
+        названием и это название ещё не встречалось в файле, иначе
+        он вставляется как новый.
+        """
+        existing = {}
+
+        for ingredient in Ingredient.objects.filter(
+            name__in={ingredient.name for ingredient in ingredients}
+        ):
+            existing.setdefault(ingredient.name, []).append(ingredient)
+
+        to_create = []
+        to_update = []
+
+        for ingredient in ingredients:
+            matches = existing.get(ingredient.name, [])
+            first_seen = ingredient.name not in self.seen_names
+            self.seen_names.add(ingredient.name)
+
+            if len(matches) == 1 and first_seen:
+                current = matches[0]
+                if current.measurement_unit != ingredient.measurement_unit:
+                    current.measurement_unit = ingredient.measurement_unit
+                    to_update.append(current)
+                continue
+            to_create.append(ingredient)
+
+        Ingredient.objects.bulk_update(to_update, ('measurement_unit',))
+        self.stats['updated'] += len(to_update)
 
-            self.stdout.write(self.style.SUCCESS(
-                '\n Данные успешно перенесены'))
+        return to_create
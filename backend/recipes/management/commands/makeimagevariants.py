@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from tqdm import tqdm
+
+from recipes.images import try_make_image_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт уменьшенные копии изображений рецептов, у которых их нет '
+        'или они сделаны для другого изображения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии для всех рецептов.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').values_list(
+            'id', 'image', 'image_variants'
+        )
+        pending = [
+            (recipe_id, image)
+            for recipe_id, image, variants in recipes.iterator()
+            if options['all'] or (variants or {}).get('source') != image
+        ]
+
+        for recipe_id, image in tqdm(pending, desc='Изображения'):
+            try_make_image_variants(recipe_id, image)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {len(pending)}'
+        ))
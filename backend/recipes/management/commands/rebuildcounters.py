@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs.registry import enqueue
+from recipes.counters import COUNTERS, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает с нуля счётчики избранного, списков покупок, '
+        'рецептов и подписок'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--background', action='store_true',
+            help='Поставить пересчёт в очередь фоновых задач (runworker).'
+        )
+
+    def handle(self, *args, **options):
+        if options['background']:
+            job = enqueue('recipes.rebuild_counters')
+            self.stdout.write(self.style.SUCCESS(
+                f'Пересчёт поставлен в очередь: задача #{job.pk}'
+            ))
+            return
+
+        with transaction.atomic():
+            rebuild_counters()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано счётчиков: {len(COUNTERS)}'
+        ))
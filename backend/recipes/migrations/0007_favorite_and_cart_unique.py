@@ -0,0 +1,77 @@
+# Generated by Django 3.2.3 on 2026-10-18 06:49
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+# Модель и поле счётчика рецепта, который она изменяет.
+MODELS = (
+    ('Favorite', 'favorites_count'),
+    ('ShoppingCart', 'shopping_cart_count'),
+)
+
+
+def remove_duplicates(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientsInRecipe = apps.get_model('recipes', 'IngredientsInRecipe')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+
+    for model_name, field in MODELS:
+        model = apps.get_model('recipes', model_name)
+        duplicates = model.objects.exclude(
+            id__in=model.objects.values('user', 'recipe').annotate(
+                first=Min('id')
+            ).values('first')
+        )
+        pairs = set(duplicates.values_list('user', 'recipe'))
+        if not pairs:
+            continue
+        duplicates.delete()
+
+        recipe_ids = {recipe_id for _, recipe_id in pairs}
+        count = model.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            total=Count('pk')
+        ).values('total')
+        Recipe.objects.filter(pk__in=recipe_ids).update(**{
+            field: Coalesce(Subquery(count, output_field=IntegerField()), 0)
+        })
+
+        if model_name != 'ShoppingCart':
+            continue
+        # Дубли удваивали количества в списках покупок.
+        user_ids = {user_id for user_id, _ in pairs}
+        ShoppingListItem.objects.filter(user__in=user_ids).delete()
+        totals = IngredientsInRecipe.objects.filter(
+            recipe__shopping_cart__user__in=user_ids
+        ).values_list(
+            'recipe__shopping_cart__user', 'ingredient'
+        ).annotate(
+            total=Sum('amount')
+        ).order_by()
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=total
+            )
+            for user_id, ingredient_id, total in totals
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='recipes_favorite_is_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='recipes_shoppingcart_is_unique'),
+        ),
+    ]
@@ -1,8 +1,16 @@
+import time
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models
+from django.db.models import (BooleanField, Case, Exists, F, FloatField,
+                              OuterRef, Q, Value, When, Window)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 
-from api.constants import ITEM_NAME_MAX_LEN, SLUG_MAX_LEN
-from users.models import CustomUser
+from api.constants import ITEM_NAME_MAX_LEN, SEARCH_CONFIG, SLUG_MAX_LEN
+from users.models import CountersModelMixin, CustomUser, Subscribe
 
 
 class Tag(models.Model):
@@ -56,7 +64,93 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+
+    def with_related(self):
+        """Загружает автора, теги и ингредиенты без запросов на рецепт."""
+        return self.select_related('author').prefetch_related(
+            'tags', 'ingredient_in_recipe__ingredient'
+        ).defer('search_vector')
+
+    def with_user_flags(self, user):
+        """Аннотирует флаги is_favorited, is_in_shopping_cart и
+        author_is_subscribed для текущего пользователя."""
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+                author_is_subscribed=Value(
+                    False, output_field=BooleanField()
+                ),
+            )
+
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            author_is_subscribed=Exists(
+                Subscribe.objects.filter(
+                    user=user, author=OuterRef('author')
+                )
+            ),
+        )
+
+    def latest_by_authors(self, author_ids, limit):
+        """Не больше limit последних рецептов каждого автора.
+
+        Номер рецепта внутри автора считается оконной функцией
+        ROW_NUMBER() OVER (PARTITION BY author_id), поэтому рецепты всей
+        страницы авторов выбираются одним запросом.
+        """
+        ranked = self.model.objects.filter(
+            author__in=author_ids
+        ).annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('author')],
+                order_by=[F('pub_date').desc(), F('id').desc()],
+            )
+        ).values('id', 'row_number')
+        sql, params = ranked.query.sql_with_params()
+
+        return self.filter(
+            id__in=RawSQL(
+                f'SELECT id FROM ({sql}) ranked WHERE row_number <= %s',
+                (*params, limit),
+            )
+        ).order_by('-pub_date', '-id')
+
+    def search(self, text):
+        """Полнотекстовый поиск по названию и описанию с ранжированием.
+
+        На PostgreSQL используется колонка search_vector с GIN-индексом,
+        которую заполняет триггер, на остальных базах - поиск подстроки
+        (на SQLite без учёта регистра только для латиницы), где совпадения
+        в названии идут первыми.
+        """
+        if connections[self.db].vendor == 'postgresql':
+            query = SearchQuery(
+                text, config=SEARCH_CONFIG, search_type='websearch'
+            )
+            return self.filter(search_vector=query).annotate(
+                rank=SearchRank(F('search_vector'), query)
+            ).order_by('-rank', '-pub_date')
+
+        return self.filter(
+            Q(name__icontains=text) | Q(text__icontains=text)
+        ).annotate(
+            rank=Case(
+                When(name__icontains=text, then=Value(1.0)),
+                default=Value(0.5),
+                output_field=FloatField(),
+            )
+        ).order_by('-rank', '-pub_date')
+
+
+class Recipe(CountersModelMixin, models.Model):
     name = models.CharField(
         max_length=ITEM_NAME_MAX_LEN,
         verbose_name='Название рецепта'
@@ -66,6 +160,8 @@ class Recipe(models.Model):
         on_delete=models.CASCADE,
         related_name='recipes',
         verbose_name='Автор рецепта',
+        # Поиск по автору покрывает индекс recipe_author_pub_date_idx.
+        db_index=False,
     )
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -103,11 +199,53 @@ class Recipe(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+    )
+    image_variants = models.JSONField(
+        verbose_name='Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
+
+    counter_fields = ('favorites_count', 'shopping_cart_count')
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = (
+            # Рецепты автора по дате: фильтр author, последние рецепты
+            # авторов в подписках (latest_by_authors).
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx',
+            ),
+            # Популярные рецепты: ordering=-favorites_count
+            # и -shopping_cart_count с полями StableOrderingFilter.
+            models.Index(
+                fields=('-favorites_count', '-pub_date', '-id'),
+                name='recipe_favorites_count_idx',
+            ),
+            models.Index(
+                fields=('-shopping_cart_count', '-pub_date', '-id'),
+                name='recipe_cart_count_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -155,6 +293,8 @@ class FavoriteAndCartAbstract(models.Model):
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
+        # Поиск по рецепту покрывает индекс (recipe, user) наследников.
+        db_index=False,
     )
 
     class Meta:
@@ -169,15 +309,88 @@ class FavoriteAndCartAbstract(models.Model):
 
 class ShoppingCart(FavoriteAndCartAbstract):
 
-    class Meta:
+    class Meta(FavoriteAndCartAbstract.Meta):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
         default_related_name = 'shopping_cart'
+        indexes = (
+            # Пользователи, у которых рецепт в корзине, и счётчики.
+            models.Index(
+                fields=('recipe', 'user'), name='shoppingcart_recipe_user_idx'
+            ),
+        )
 
 
 class Favorite(FavoriteAndCartAbstract):
 
-    class Meta:
+    class Meta(FavoriteAndCartAbstract.Meta):
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
         default_related_name = 'favorites'
+        indexes = (
+            models.Index(
+                fields=('recipe', 'user'), name='favorite_recipe_user_idx'
+            ),
+        )
+
+
+class ShoppingListItem(models.Model):
+    """Суммарное количество ингредиента в списке покупок пользователя.
+
+    Поддерживается инкрементально (см. recipes.shopping_list) при
+    изменении списка покупок и ингредиентов рецептов из него.
+    """
+
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент'
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Количество'
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списках покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.ingredient} - {self.amount}'
+
+
+class ReferenceVersion(models.Model):
+    """Метка версии справочника (тегов, ингредиентов).
+
+    Хранится в базе, а не в кэше, чтобы изменение из любого процесса,
+    в том числе из jsontodb, сразу видели все воркеры.
+    """
+
+    label = models.CharField(
+        max_length=100,
+        primary_key=True,
+        verbose_name='Модель'
+    )
+    version = models.FloatField(
+        default=time.time,
+        verbose_name='Время изменения'
+    )
+
+    class Meta:
+        verbose_name = 'Версия справочника'
+        verbose_name_plural = 'Версии справочников'
+
+    def __str__(self):
+        return f'{self.label} - {self.version}'
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import (IngredientsInRecipe, Recipe, ShoppingCart,
+                            ShoppingListItem)
+from users.models import CustomUser
+
+
+def refresh_shopping_list(user_ids, ingredient_ids=None):
+    """Пересчитывает суммы списка покупок для пар пользователь-ингредиент.
+
+    Пересчитываются только переданные ключи, поэтому стоимость зависит
+    от числа затронутых ингредиентов, а не от размера списка покупок.
+    Без ingredient_ids списки пользователей пересчитываются целиком.
+    Результат не зависит от порядка и количества вызовов.
+
+    Пересчёты списков одного пользователя выполняются по очереди:
+    строки пользователей блокируются до конца транзакции, и суммы
+    считаются уже после блокировки, поэтому видят изменения корзины,
+    закоммиченные конкурирующим пересчётом.
+    """
+    user_ids = set(user_ids)
+    totals = IngredientsInRecipe.objects.filter(
+        recipe__shopping_cart__user__in=user_ids
+    )
+    items = ShoppingListItem.objects.filter(user__in=user_ids)
+
+    if ingredient_ids is not None:
+        ingredient_ids = set(ingredient_ids)
+        if not ingredient_ids:
+            return
+        totals = totals.filter(ingredient__in=ingredient_ids)
+        items = items.filter(ingredient__in=ingredient_ids)
+
+    if not user_ids:
+        return
+
+    totals = totals.values_list(
+        'recipe__shopping_cart__user', 'ingredient'
+    ).annotate(
+        total=Sum('amount')
+    ).order_by()
+
+    with transaction.atomic():
+        # FOR NO KEY UPDATE не конфликтует с блокировками внешних
+        # ключей при вставке в корзину той же транзакцией и другими,
+        # порядок по pk исключает взаимные блокировки пересчётов.
+        list(CustomUser.objects.select_for_update(no_key=True).filter(
+            pk__in=user_ids
+        ).order_by('pk').values_list('pk', flat=True))
+        items.delete()
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=total
+            )
+            for user_id, ingredient_id, total in totals
+        )
+
+
+def recipe_ingredient_ids(recipe_id):
+    return set(
+        IngredientsInRecipe.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', flat=True)
+    )
+
+
+def refresh_recipe_in_shopping_lists(recipe_id, ingredient_ids):
+    """Пересчитывает списки покупок всех, у кого рецепт в корзине,
+    после изменения его ингредиентов ingredient_ids.
+
+    Строка рецепта блокируется до чтения корзин: добавление рецепта
+    в корзину в другой транзакции (блокировка внешнего ключа) ждёт
+    окончания пересчёта или пересчёт ждёт добавления, и новый
+    пользователь не пропускается.
+    """
+    with transaction.atomic():
+        list(Recipe.objects.select_for_update().filter(
+            pk=recipe_id
+        ).values_list('pk', flat=True))
+        user_ids = ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True)
+
+        refresh_shopping_list(user_ids, ingredient_ids)
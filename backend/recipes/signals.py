@@ -0,0 +1,80 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.counters import COUNTERS, change_counter, change_counters
+from recipes.images import schedule_image_variants
+from recipes.models import Favorite, IngredientsInRecipe, Recipe, ShoppingCart
+from recipes.shopping_list import recipe_ingredient_ids, refresh_shopping_list
+from recipes.user_recipes import user_recipes_changed
+from users.models import Subscribe
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        refresh_shopping_list(
+            [instance.user_id], recipe_ingredient_ids(instance.recipe_id)
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remember_shopping_cart_ingredients(sender, instance, **kwargs):
+    # При каскадном удалении рецепта его ингредиенты могут быть удалены
+    # раньше записи из корзины, поэтому запоминаем их заранее.
+    instance.ingredient_ids = recipe_ingredient_ids(instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    refresh_shopping_list(
+        [instance.user_id], getattr(instance, 'ingredient_ids', ())
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def make_image_variants(sender, instance, **kwargs):
+    image_variants = instance.image_variants or {}
+
+    if instance.image and image_variants.get('source') != instance.image.name:
+        schedule_image_variants(instance)
+
+
+def update_counters(instance, delta):
+    for model, field, source, relation in COUNTERS:
+        if isinstance(instance, source):
+            change_counter(
+                model, getattr(instance, f'{relation}_id'), field, delta
+            )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Subscribe)
+def increase_counters(sender, instance, created, **kwargs):
+    if created:
+        update_counters(instance, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Subscribe)
+def decrease_counters(sender, instance, **kwargs):
+    update_counters(instance, -1)
+
+
+@receiver(user_recipes_changed, sender=Favorite)
+@receiver(user_recipes_changed, sender=ShoppingCart)
+def update_user_recipes(sender, user_id, recipe_ids, delta, **kwargs):
+    for model, field, source, relation in COUNTERS:
+        if source is sender:
+            change_counters(model, recipe_ids, field, delta)
+
+    if sender is ShoppingCart:
+        refresh_shopping_list(
+            [user_id],
+            IngredientsInRecipe.objects.filter(
+                recipe__in=recipe_ids
+            ).values_list('ingredient_id', flat=True),
+        )
@@ -0,0 +1,22 @@
+from django.db import transaction
+
+from jobs.registry import task
+from recipes.counters import rebuild_counters
+from recipes.images import make_image_variants
+from recipes.shopping_list import refresh_shopping_list
+
+
+@task('recipes.image_variants')
+def image_variants(recipe_id, name):
+    make_image_variants(recipe_id, name)
+
+
+@task('recipes.rebuild_counters', max_attempts=3)
+def rebuild_all_counters():
+    with transaction.atomic():
+        rebuild_counters()
+
+
+@task('recipes.refresh_shopping_lists')
+def refresh_shopping_lists(user_ids, ingredient_ids=None):
+    refresh_shopping_list(user_ids, ingredient_ids)
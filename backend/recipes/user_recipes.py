@@ -0,0 +1,73 @@
+"""Добавление рецептов в избранное и список покупок и удаление из них.
+
+Каждая операция - один INSERT ... ON CONFLICT DO NOTHING или один
+DELETE без предварительного чтения, поэтому одновременные запросы
+не приводят к ошибке уникальности. Сигналы моделей при такой записи
+не отправляются, вместо них отправляется user_recipes_changed.
+"""
+from django.db import connection, transaction
+from django.dispatch import Signal
+
+from recipes.models import Recipe
+
+# Отправляется с sender=Favorite или ShoppingCart после изменения:
+# user_id, recipe_ids и delta (1 - добавлены, -1 - удалены).
+user_recipes_changed = Signal()
+
+
+def add_recipes(model, user, recipe_ids):
+    """Добавляет рецепты recipe_ids и возвращает id добавленных.
+
+    Уже добавленные и несуществующие рецепты пропускаются.
+    """
+    quote = connection.ops.quote_name
+
+    return execute(model, user, 1, (
+        f'INSERT INTO {quote(model._meta.db_table)} '
+        f'({column(model, "user")}, {column(model, "recipe")}) '
+        f'SELECT %s, {quote(Recipe._meta.pk.column)} '
+        f'FROM {quote(Recipe._meta.db_table)} '
+        f'WHERE {quote(Recipe._meta.pk.column)} IN ({{ids}}) '
+        f'ON CONFLICT DO NOTHING '
+        f'RETURNING {column(model, "recipe")}'
+    ), recipe_ids)
+
+
+def remove_recipes(model, user, recipe_ids):
+    """Удаляет рецепты recipe_ids и возвращает id удалённых."""
+    return execute(model, user, -1, (
+        f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} '
+        f'WHERE {column(model, "user")} = %s '
+        f'AND {column(model, "recipe")} IN ({{ids}}) '
+        f'RETURNING {column(model, "recipe")}'
+    ), recipe_ids)
+
+
+def column(model, field):
+    return connection.ops.quote_name(model._meta.get_field(field).column)
+
+
+def execute(model, user, delta, sql, recipe_ids):
+    recipe_ids = sorted(set(recipe_ids))
+    if not recipe_ids:
+        return []
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql.format(ids=', '.join(['%s'] * len(recipe_ids))),
+                [user.pk, *recipe_ids],
+            )
+            changed = sorted(
+                recipe_id for recipe_id, in cursor.fetchall()
+            )
+
+        if changed:
+            user_recipes_changed.send(
+                sender=model,
+                user_id=user.pk,
+                recipe_ids=changed,
+                delta=delta,
+            )
+
+    return changed
@@ -10,8 +10,11 @@ class UserAdmin(admin.ModelAdmin):
         'first_name',
         'last_name',
         'email',
-        'username'
+        'username',
+        'recipes_count',
+        'followers_count'
     )
+    readonly_fields = ('recipes_count', 'followers_count', 'following_count')
     list_filter = ('email', 'first_name')
     search_fields = ('username', 'email')
 
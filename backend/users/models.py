@@ -6,7 +6,38 @@ from django.db import models
 from users.validators import validate_username
 
 
-class CustomUser(AbstractUser):
+class CountersModelMixin:
+    """Не записывает поля-счётчики при обычном save() сохранённой модели.
+
+    Счётчики меняются только выражениями F() (recipes.counters), а save()
+    записал бы значения, прочитанные до этих изменений, и потерял бы их.
+    """
+
+    counter_fields = ()
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if (
+            update_fields is None
+            and not force_insert
+            and not self._state.adding
+            and self.pk is not None
+        ):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+
+        super().save(
+            force_insert=force_insert, force_update=force_update,
+            using=using, update_fields=update_fields,
+        )
+
+
+class CustomUser(CountersModelMixin, AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = [
         'username',
@@ -38,6 +69,26 @@ class CustomUser(AbstractUser):
         validators=(validate_username,)
     )
 
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0,
+        editable=False
+    )
+
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False
+    )
+
+    following_count = models.PositiveIntegerField(
+        verbose_name='Подписок',
+        default=0,
+        editable=False
+    )
+
+    counter_fields = ('recipes_count', 'followers_count', 'following_count')
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
@@ -51,7 +102,10 @@ class Subscribe(models.Model):
         CustomUser,
         on_delete=models.CASCADE,
         related_name='follower',
-        verbose_name='Подписчик'
+        verbose_name='Подписчик',
+        # Поиск по подписчику покрывают unique_follow
+        # и subscribe_user_id_idx.
+        db_index=False,
     )
     author = models.ForeignKey(
         CustomUser,
@@ -72,6 +126,12 @@ class Subscribe(models.Model):
                 ), name="self_subscription"
             ),
         )
+        indexes = (
+            # Подписки пользователя от новых к старым (пагинация по id).
+            models.Index(
+                fields=('user', '-id'), name='subscribe_user_id_idx'
+            ),
+        )
 
     def __str__(self) -> str:
         return f'{self.user} подписан на {self.author}'
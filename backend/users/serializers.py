@@ -3,9 +3,20 @@ from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
 import api
+from api.constants import SUBSCRIPTION_RECIPES_LIMIT
 from users.models import CustomUser, Subscribe
 
 
+def get_recipes_limit(request):
+    """Число рецептов автора в подписках из параметра recipes_limit."""
+    try:
+        limit = int(request.query_params['recipes_limit'])
+    except (AttributeError, KeyError, ValueError):
+        return SUBSCRIPTION_RECIPES_LIMIT
+
+    return max(limit, 0)
+
+
 class CustomUserSerializer(UserSerializer):
     is_subscribed = serializers.SerializerMethodField(
         method_name='get_is_subscribed'
@@ -23,6 +34,9 @@ class CustomUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        is_subscribed = getattr(obj, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
@@ -31,11 +45,24 @@ class CustomUserSerializer(UserSerializer):
         ).exists()
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class UserWithCountersSerializer(CustomUserSerializer):
+    """Пользователь на страницах /api/users/ со счётчиками."""
 
-    is_subscribed = serializers.SerializerMethodField(
-        method_name='get_is_subscribed'
-    )
+    class Meta:
+        model = CustomUser
+        fields = CustomUserSerializer.Meta.fields + (
+            'recipes_count',
+            'followers_count',
+            'following_count',
+        )
+        read_only_fields = (
+            'recipes_count',
+            'followers_count',
+            'following_count',
+        )
+
+
+class SubscriptionSerializer(CustomUserSerializer):
     recipes = serializers.SerializerMethodField(
         method_name='get_recipes'
     )
@@ -56,19 +83,17 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             'recipes_count'
         )
 
-    def get_is_subscribed(self, user):
-        current_user = self.context.get('current_user')
-        return Subscribe.objects.filter(
-            user=user, author=current_user
-        ).exists()
-
     def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
     def get_recipes(self, obj):
-
-        recipes = obj.recipes.all()[:3]
         request = self.context.get('request')
+        recipes = getattr(obj, 'latest_recipes', None)
+
+        if recipes is None:
+            recipes = obj.recipes.order_by(
+                '-pub_date', '-id'
+            )[:get_recipes_limit(request)]
 
         return api.serializers.RecipeSmallSerializer(
             recipes,
@@ -1,13 +1,18 @@
 from django.urls import include, path
+from rest_framework.routers import DefaultRouter
 
-from users.views import SubscribeView, SubscriptionViewSet
+from users.views import (CustomUserViewSet, SubscribeView,
+                         SubscriptionViewSet)
 
 app_name = 'users'
 
+router = DefaultRouter()
+router.register('users', CustomUserViewSet)
+
 
 urlpatterns = [
     path('users/subscriptions/', SubscriptionViewSet.as_view()),
     path('users/<int:pk>/subscribe/', SubscribeView.as_view()),
-    path('', include('djoser.urls')),
+    path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
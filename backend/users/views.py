@@ -1,13 +1,43 @@
+from django.db.models import BooleanField, Exists, F, OuterRef, Value
 from django.shortcuts import get_object_or_404
+from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from api.filters import StableOrderingFilter
 from api.pagination import CustomPagination
+from recipes.models import Recipe
 from users.models import CustomUser, Subscribe
-from users.serializers import FollowSerializer, SubscriptionSerializer
+from users.serializers import (FollowSerializer, SubscriptionSerializer,
+                               get_recipes_limit)
+
+
+class CustomUserViewSet(UserViewSet):
+    """Пользователи djoser с флагом is_subscribed из аннотации.
+
+    CustomUserSerializer читает аннотацию, поэтому список загружается
+    одним запросом вместо запроса подписки на каждого пользователя.
+    Список сортируется по счётчикам из параметра ordering.
+    """
+
+    filter_backends = (StableOrderingFilter,)
+    ordering_fields = ('recipes_count', 'followers_count', 'following_count')
+    ordering_tie_breakers = ('id',)
+
+    def get_queryset(self):
+        user = self.request.user
+
+        if user.is_anonymous:
+            is_subscribed = Value(False, output_field=BooleanField())
+        else:
+            is_subscribed = Exists(
+                Subscribe.objects.filter(user=user, author=OuterRef('pk'))
+            )
+
+        return super().get_queryset().annotate(is_subscribed=is_subscribed)
 
 
 class SubscribeView(APIView):
@@ -46,8 +76,16 @@ class SubscribeView(APIView):
 
 
 class SubscriptionViewSet(ListAPIView):
+    """Авторы, на которых подписан пользователь, с последними рецептами.
+
+    Страница загружается постоянным числом запросов: флаг is_subscribed
+    и recipes_count берутся из аннотации и счётчика, а recipes_limit
+    последних рецептов всех авторов страницы - одним оконным запросом.
+    """
+
     serializer_class = SubscriptionSerializer
     pagination_class = CustomPagination
+    cursor_ordering = ('-subscription_id',)
     permission_classes = (IsAuthenticated,)
 
     def get_serializer_context(self):
@@ -56,4 +94,33 @@ class SubscriptionViewSet(ListAPIView):
         return context
 
     def get_queryset(self):
-        return CustomUser.objects.filter(following__user=self.request.user)
+        return CustomUser.objects.filter(
+            following__user=self.request.user
+        ).annotate(
+            subscription_id=F('following__id'),
+            is_subscribed=Value(True, output_field=BooleanField()),
+        ).order_by('-subscription_id')
+
+    def paginate_queryset(self, queryset):
+        authors = super().paginate_queryset(queryset)
+
+        if authors is not None:
+            self.add_latest_recipes(authors)
+
+        return authors
+
+    def add_latest_recipes(self, authors):
+        limit = get_recipes_limit(self.request)
+        recipes = {author.id: [] for author in authors}
+
+        if limit and recipes:
+            for recipe in Recipe.objects.latest_by_authors(
+                recipes, limit
+            ).only(
+                'id', 'name', 'image', 'image_variants', 'cooking_time',
+                'author'
+            ):
+                recipes[recipe.author_id].append(recipe)
+
+        for author in authors:
+            author.latest_recipes = recipes[author.id]